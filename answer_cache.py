@@ -0,0 +1,101 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+from embedding_cache import normalize_query
+from prompt_builder import serialize_item
+load_dotenv()
+
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+# Answers are reused for at most this long even if the index does not change
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+# The generators report failures as text; those answers are never cached
+ERROR_PREFIXES = ("An error occurred", "I'm sorry, but I couldn't")
+
+
+def context_fingerprint(sections):
+    """Hash of the retrieved context ({section: items}); chunks are content-addressed, so their text is their id."""
+    digest = hashlib.sha256()
+    for name in sorted(sections):
+        digest.update(f"\0{name}\0".encode("utf-8"))
+        for item in sections[name] or []:
+            digest.update(hashlib.sha256(serialize_item(item).encode("utf-8")).digest())
+    return digest.hexdigest()
+
+
+def answer_key(assistant_name, query, query_type, project_name, context_hash, index_version):
+    parts = [assistant_name, normalize_query(query), query_type or "", normalize_query(project_name), context_hash, index_version]
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """Bounded LRU of final answers with a TTL, keyed on the question and a fingerprint of the context it was given.
+
+    Each assistant's entries are dropped as soon as a lookup sees a new index version for it, i.e. after
+    index_client_data.py rewrote any of its index files.
+    """
+
+    def __init__(self, max_entries=ANSWER_CACHE_SIZE, ttl_seconds=ANSWER_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()  # key -> (assistant, answer, expiry)
+        self._versions = {}  # assistant -> index version its entries were built from
+        self._lock = threading.Lock()
+
+    def _check_version(self, assistant_name, index_version):
+        """Drops the assistant's entries if its index changed. Caller holds _lock."""
+        known = self._versions.get(assistant_name)
+        if known == index_version:
+            return
+        if known is not None:
+            stale = [key for key, entry in self._entries.items() if entry[0] == assistant_name]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += 1
+            print(f"♻️ Index of {assistant_name} changed, dropped {len(stale)} cached answers")
+        self._versions[assistant_name] = index_version
+
+    def get(self, key, assistant_name, index_version):
+        now = time.monotonic()
+        with self._lock:
+            self._check_version(assistant_name, index_version)
+            entry = self._entries.get(key)
+            if entry and entry[2] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, assistant_name, index_version, answer):
+        if not answer or answer.startswith(ERROR_PREFIXES):
+            return
+        with self._lock:
+            self._check_version(assistant_name, index_version)
+            self._entries[key] = (assistant_name, answer, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self, key):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                print("🗑️ Evicted a cached answer")
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "answer_cache_hits": self.hits,
+                "answer_cache_misses": self.misses,
+                "answer_cache_hit_rate": self.hits / total if total else 0.0,
+                "answer_cache_entries": len(self._entries),
+                "answer_cache_invalidations": self.invalidations,
+            }
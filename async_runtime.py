@@ -0,0 +1,85 @@
+import os
+import asyncio
+import threading
+from dotenv import load_dotenv
+load_dotenv()
+
+# Queries allowed to run at once on the shared loop; the rest wait as parked coroutines, not threads
+MAX_INFLIGHT_QUERIES = int(os.getenv("MAX_INFLIGHT_QUERIES", "200"))
+
+
+class AsyncRuntime:
+    """One application-wide asyncio loop on a dedicated thread.
+
+    Sync code (Flask handlers, dispatcher workers) hands it coroutines with submit() instead of creating a loop
+    per query, so Slack and Gemini calls in flight cost coroutines rather than threads.
+    """
+
+    def __init__(self, max_inflight=MAX_INFLIGHT_QUERIES):
+        self.max_inflight = max_inflight
+        self.loop = asyncio.new_event_loop()
+        self._semaphore = None
+        self._tasks = set()
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self._thread = threading.Thread(target=self._run, name="asyncio-loop", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self._semaphore = asyncio.Semaphore(self.max_inflight)
+        self.loop.run_forever()
+
+    async def _guarded(self, coro):
+        self._tasks.add(asyncio.current_task())
+        try:
+            async with self._semaphore:
+                self.running += 1
+                try:
+                    result = await coro
+                except Exception as e:
+                    self.failed += 1
+                    print(f"❌ Error in {coro.__qualname__}: {str(e)}")
+                    return None
+                finally:
+                    self.running -= 1
+                self.completed += 1
+                return result
+        finally:
+            self._tasks.discard(asyncio.current_task())
+
+    def submit(self, coro):
+        """Schedules coro on the loop and returns a concurrent.futures.Future for its result."""
+        return asyncio.run_coroutine_threadsafe(self._guarded(coro), self.loop)
+
+    def run(self, coro, timeout=None):
+        """Runs coro on the loop and blocks the calling (non-loop) thread until it finishes."""
+        return self.submit(coro).result(timeout)
+
+    def stats(self):
+        return {
+            "loop_tasks": len(self._tasks),
+            "loop_running": self.running,
+            "loop_waiting": len(self._tasks) - self.running,
+            "loop_completed": self.completed,
+            "loop_failed": self.failed,
+        }
+
+    def shutdown(self, timeout=30):
+        """Waits up to timeout seconds for queries still on the loop, then stops it."""
+        if not self.loop.is_running():
+            return
+
+        async def drain():
+            pending = [task for task in self._tasks if task is not asyncio.current_task()]
+            if pending:
+                print(f"🛑 Waiting for {len(pending)} queries on the event loop...")
+                await asyncio.wait(pending, timeout=timeout)
+
+        try:
+            asyncio.run_coroutine_threadsafe(drain(), self.loop).result(timeout + 1)
+        except Exception as e:
+            print(f"⚠️ Event loop did not drain cleanly: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(5)
@@ -0,0 +1,138 @@
+import os
+import sys
+import gc
+import mmap
+import time
+import pickle
+import random
+import numpy as np
+
+# File layout: MAGIC, chunk count n (int64), n rows of (chunk id, start, end) int64 sorted by id, then the UTF-8 blob.
+# Everything is in one file so a rebuild can swap it atomically under readers that still have the old one mapped.
+MAGIC = b"CHUNKS01"
+HEADER_SIZE = len(MAGIC) + 8
+
+
+def chunk_store_path(prefix):
+    return f"{prefix}_chunks.bin"
+
+
+def write_chunk_store(prefix, docstore):
+    """Writes a {chunk id: text} dict as a chunk store file next to the FAISS index with the same prefix."""
+    path = chunk_store_path(prefix)
+    ids = sorted(int(chunk_id) for chunk_id in docstore)
+    table = np.zeros((len(ids), 3), dtype=np.int64)
+    blobs = []
+    position = 0
+    for row, chunk_id in enumerate(ids):
+        data = docstore[chunk_id].encode("utf-8")
+        table[row] = (chunk_id, position, position + len(data))
+        blobs.append(data)
+        position += len(data)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.int64(len(ids)).tobytes())
+        f.write(table.tobytes())
+        for data in blobs:
+            f.write(data)
+    os.replace(tmp_path, path)
+    return path
+
+
+class ChunkStore:
+    """Read-only, memory-mapped docstore: looking up k chunks only touches the pages holding those k chunks."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a chunk store")
+        count = int(np.frombuffer(self._mm, dtype=np.int64, count=1, offset=len(MAGIC))[0])
+        self._table = np.frombuffer(self._mm, dtype=np.int64, count=count * 3, offset=HEADER_SIZE).reshape(count, 3)
+        self._ids = self._table[:, 0]
+        self._blob_offset = HEADER_SIZE + count * 3 * 8
+
+    def get(self, chunk_id, default=None):
+        position = int(np.searchsorted(self._ids, chunk_id))
+        if position < len(self._ids) and self._ids[position] == chunk_id:
+            _, start, end = self._table[position]
+            return self._mm[self._blob_offset + start:self._blob_offset + end].decode("utf-8")
+        return default
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, chunk_id):
+        return self.get(chunk_id) is not None
+
+    def keys(self):
+        return [int(chunk_id) for chunk_id in self._ids]
+
+    def values(self):
+        return [self.get(chunk_id) for chunk_id in self._ids]
+
+    def items(self):
+        return [(int(chunk_id), self.get(chunk_id)) for chunk_id in self._ids]
+
+
+def migrate_pickles(index_dir="faiss_index"):
+    """Converts every *_docstore.pkl in index_dir into a chunk store. The pickles are left in place."""
+    for file in sorted(os.listdir(index_dir)):
+        if not file.endswith("_docstore.pkl"):
+            continue
+        prefix = os.path.join(index_dir, file[:-len("_docstore.pkl")])
+        with open(os.path.join(index_dir, file), "rb") as f:
+            docstore = pickle.load(f)
+        path = write_chunk_store(prefix, docstore)
+        print(f"📦 Migrated {file} → {os.path.basename(path)} ({len(docstore)} chunks)")
+
+
+def _rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def benchmark(index_dir="faiss_index", top_k=5):
+    """Compares load time and RSS growth of the pickle docstores against their chunk stores, fetching top_k chunks each."""
+    print(f"{'docstore':<45} {'pickle ms':>10} {'pickle RSS':>11} {'store ms':>9} {'store RSS':>10}")
+    for file in sorted(os.listdir(index_dir)):
+        if not file.endswith("_docstore.pkl"):
+            continue
+        prefix = os.path.join(index_dir, file[:-len("_docstore.pkl")])
+        if not os.path.exists(chunk_store_path(prefix)):
+            continue
+
+        gc.collect()
+        rss = _rss_bytes()
+        started = time.perf_counter()
+        store = ChunkStore(chunk_store_path(prefix))
+        ids = random.sample(store.keys(), min(top_k, len(store)))
+        [store.get(chunk_id) for chunk_id in ids]
+        store_ms = (time.perf_counter() - started) * 1000
+        store_rss = _rss_bytes() - rss
+        del store
+
+        gc.collect()
+        rss = _rss_bytes()
+        started = time.perf_counter()
+        with open(os.path.join(index_dir, file), "rb") as f:
+            docstore = pickle.load(f)
+        [docstore.get(chunk_id) for chunk_id in ids]
+        pickle_ms = (time.perf_counter() - started) * 1000
+        pickle_rss = _rss_bytes() - rss
+        del docstore
+
+        print(f"{file:<45} {pickle_ms:>10.2f} {pickle_rss / 1024:>9.0f}KB {store_ms:>9.2f} {store_rss / 1024:>8.0f}KB")
+
+
+if __name__ == "__main__":
+    # python chunk_store.py migrate|benchmark [index_dir]
+    command = sys.argv[1] if len(sys.argv) > 1 else "migrate"
+    directory = sys.argv[2] if len(sys.argv) > 2 else "faiss_index"
+    if command == "benchmark":
+        benchmark(directory)
+    else:
+        migrate_pickles(directory)
@@ -0,0 +1,135 @@
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from dotenv import load_dotenv
+load_dotenv()
+
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2048"))
+# Optional sqlite file so cached query embeddings survive restarts; empty keeps the cache in memory only
+QUERY_EMBEDDING_CACHE_PATH = os.getenv("QUERY_EMBEDDING_CACHE_PATH", "")
+# sqlite file of chunk embeddings reused across indexing runs
+CHUNK_EMBEDDING_STORE_PATH = os.getenv("CHUNK_EMBEDDING_STORE_PATH", "embedding_cache.sqlite")
+
+
+def normalize_query(text):
+    """Lowercases and collapses whitespace so trivially different spellings of a query share a cache entry."""
+    return re.sub(r"\s+", " ", text or "").strip().lower()
+
+
+def embedding_key(text, model):
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class QueryEmbeddingCache:
+    """Bounded LRU of query embeddings keyed on (model, normalized query), optionally backed by sqlite."""
+
+    def __init__(self, max_entries=QUERY_EMBEDDING_CACHE_SIZE, path=QUERY_EMBEDDING_CACHE_PATH):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS query_embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+            self._db.commit()
+
+    def get(self, query, model):
+        key = embedding_key(normalize_query(query), model)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            if self._db is not None:
+                row = self._db.execute("SELECT vector FROM query_embeddings WHERE key = ?", (key,)).fetchone()
+                if row:
+                    embedding = np.frombuffer(row[0], dtype=np.float32).tolist()
+                    self._remember(key, embedding)
+                    self.hits += 1
+                    return embedding
+            self.misses += 1
+            return None
+
+    def put(self, query, model, embedding):
+        key = embedding_key(normalize_query(query), model)
+        with self._lock:
+            self._remember(key, embedding)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (key, vector) VALUES (?, ?)",
+                    (key, np.asarray(embedding, dtype=np.float32).tobytes()),
+                )
+                self._db.commit()
+
+    def _remember(self, key, embedding):
+        self._entries[key] = embedding
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+class ChunkEmbeddingStore:
+    """Content-addressed sqlite store of chunk embeddings: sha256(model, task_type, text) -> float32 vector."""
+
+    def __init__(self, path=CHUNK_EMBEDDING_STORE_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS chunk_embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+        self._db.commit()
+
+    @staticmethod
+    def _key(text, model, task_type):
+        return embedding_key(text, f"{model}\0{task_type}")
+
+    def get_many(self, texts, model, task_type):
+        """Returns one vector per text, or None where the text has not been embedded before."""
+        keys = [self._key(text, model, task_type) for text in texts]
+        found = {}
+        with self._lock:
+            # Stay under sqlite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM chunk_embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update((key, np.frombuffer(vector, dtype=np.float32).tolist()) for key, vector in rows)
+            vectors = [found.get(key) for key in keys]
+            hits = sum(vector is not None for vector in vectors)
+            self.hits += hits
+            self.misses += len(vectors) - hits
+        return vectors
+
+    def put_many(self, texts, vectors, model, task_type):
+        rows = [
+            (self._key(text, model, task_type), np.asarray(vector, dtype=np.float32).tobytes())
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO chunk_embeddings (key, vector) VALUES (?, ?)", rows)
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
@@ -0,0 +1,118 @@
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import google.api_core.exceptions
+from dotenv import load_dotenv
+from token_estimate import CHARS_PER_TOKEN
+load_dotenv()
+
+# batchEmbedContents accepts at most 100 texts per request
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "8"))
+
+
+class AIMDRateController:
+    """Limits in-flight embedding requests, growing the limit additively on success and halving it on quota errors."""
+
+    def __init__(self, max_concurrency=EMBEDDING_MAX_CONCURRENCY, min_concurrency=1, increase=1.0, decrease=0.5):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.increase = increase
+        self.decrease = decrease
+        self.limit = float(max(min_concurrency, max_concurrency // 2))
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, throttled=False):
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.min_concurrency, self.limit * self.decrease)
+            else:
+                # +increase per full window of successful requests, i.e. roughly once per round trip
+                self.limit = min(self.max_concurrency, self.limit + self.increase / self.limit)
+            self._condition.notify_all()
+
+
+class BatchEmbedder:
+    """Packs texts into batched embedding requests sent concurrently under one shared AIMDRateController.
+
+    embed_batch takes a list of texts and returns one vector per text; swap in a fake for local runs.
+    """
+
+    def __init__(self, embed_batch, batch_size=EMBEDDING_BATCH_SIZE, controller=None, retries=5, delay=2):
+        self.embed_batch = embed_batch
+        self.batch_size = batch_size
+        self.controller = controller or AIMDRateController()
+        self.retries = retries
+        self.delay = delay
+        self._executor = ThreadPoolExecutor(max_workers=self.controller.max_concurrency, thread_name_prefix="embed")
+        self._stats_lock = threading.Lock()
+        self.chunks = 0
+        self.chars = 0
+        self.requests = 0
+        self.throttled = 0
+        self.busy_seconds = 0.0
+
+    def _embed_with_retry(self, batch):
+        for attempt in range(self.retries):
+            self.controller.acquire()
+            try:
+                vectors = self.embed_batch(batch)
+            except google.api_core.exceptions.ResourceExhausted:
+                self.controller.release(throttled=True)
+                with self._stats_lock:
+                    self.throttled += 1
+                if attempt == self.retries - 1:
+                    print(f"❌ Failed to embed batch after {self.retries} attempts due to quota limits.")
+                    raise
+                wait = self.delay * (2 ** attempt) + random.uniform(0, 1)
+                print(f"⏳ Quota exceeded. Concurrency limit now {int(self.controller.limit)}, retrying in {wait:.2f} seconds...")
+                time.sleep(wait)
+                continue
+            except Exception:
+                self.controller.release()
+                raise
+            self.controller.release()
+            with self._stats_lock:
+                self.requests += 1
+                self.chunks += len(batch)
+                self.chars += sum(len(text) for text in batch)
+            return vectors
+
+    def embed(self, texts):
+        """Embeds texts in order, returning one vector per text."""
+        if not texts:
+            return []
+        started = time.monotonic()
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        results = list(self._executor.map(self._embed_with_retry, batches))
+        elapsed = max(time.monotonic() - started, 1e-9)
+        with self._stats_lock:
+            self.busy_seconds += elapsed
+        chars = sum(len(text) for text in texts)
+        print(f"📈 Embedded {len(texts)} chunks in {len(batches)} requests, {elapsed:.1f}s "
+              f"({len(texts) / elapsed:.1f} chunks/s, {chars / CHARS_PER_TOKEN / elapsed:.0f} tokens/s)")
+        return [vector for batch in results for vector in batch]
+
+    def report(self):
+        """Throughput over everything embedded so far by this engine."""
+        with self._stats_lock:
+            seconds = self.busy_seconds or 1e-9
+            return {
+                "chunks": self.chunks,
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "seconds": round(self.busy_seconds, 1),
+                "chunks_per_second": round(self.chunks / seconds, 1),
+                "tokens_per_second": round(self.chars / CHARS_PER_TOKEN / seconds),
+                "concurrency_limit": int(self.controller.limit),
+            }
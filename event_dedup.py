@@ -0,0 +1,86 @@
+import os
+import time
+import sqlite3
+import threading
+from dotenv import load_dotenv
+load_dotenv()
+
+# Slack retries for about an hour at most; keep seen event ids a little longer than that
+SLACK_DEDUP_TTL_SECONDS = int(os.getenv("SLACK_DEDUP_TTL_SECONDS", "3900"))
+# Optional sqlite file so every worker process (and a restarted one) shares the seen-set; empty keeps it in memory
+SLACK_DEDUP_PATH = os.getenv("SLACK_DEDUP_PATH", "")
+
+
+def event_key(data):
+    """Idempotency key for a Slack event callback: event_id, else the message's client_msg_id, else channel + ts."""
+    event = data.get("event", {})
+    if data.get("event_id"):
+        return data["event_id"]
+    if event.get("client_msg_id"):
+        return f"msg:{event['client_msg_id']}"
+    if event.get("channel") and event.get("ts"):
+        return f"ts:{event['channel']}:{event['ts']}"
+    return None
+
+
+class SeenEvents:
+    """TTL'd set of Slack event keys already accepted, so re-deliveries are dropped before any work starts."""
+
+    def __init__(self, ttl_seconds=SLACK_DEDUP_TTL_SECONDS, path=SLACK_DEDUP_PATH):
+        self.ttl_seconds = ttl_seconds
+        self.duplicates = 0
+        self.retries = 0
+        self._seen = {}  # key -> expiry
+        self._lock = threading.Lock()
+        self._last_purge = time.time()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS seen_events (key TEXT PRIMARY KEY, expires REAL)")
+            self._db.commit()
+
+    def first_time(self, key, retry_num=None):
+        """Records key and returns True, or returns False if it was already seen within the TTL."""
+        now = time.time()
+        with self._lock:
+            if retry_num:
+                self.retries += 1
+            self._purge(now)
+            if self._db is not None:
+                # The primary key makes the claim atomic across processes sharing the file
+                self._db.execute("DELETE FROM seen_events WHERE key = ? AND expires < ?", (key, now))
+                claimed = self._db.execute(
+                    "INSERT OR IGNORE INTO seen_events (key, expires) VALUES (?, ?)", (key, now + self.ttl_seconds)
+                ).rowcount == 1
+                self._db.commit()
+            else:
+                claimed = self._seen.get(key, 0) < now
+                if claimed:
+                    self._seen[key] = now + self.ttl_seconds
+            if not claimed:
+                self.duplicates += 1
+            return claimed
+
+    def forget(self, key):
+        """Un-records key so a re-delivery is processed, e.g. when the event could not be queued."""
+        with self._lock:
+            self._seen.pop(key, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM seen_events WHERE key = ?", (key,))
+                self._db.commit()
+
+    def _purge(self, now):
+        if now - self._last_purge < 60:
+            return
+        self._last_purge = now
+        self._seen = {key: expires for key, expires in self._seen.items() if expires >= now}
+        if self._db is not None:
+            self._db.execute("DELETE FROM seen_events WHERE expires < ?", (now,))
+
+    def stats(self):
+        with self._lock:
+            tracked = len(self._seen)
+            if self._db is not None:
+                tracked = self._db.execute("SELECT COUNT(*) FROM seen_events").fetchone()[0]
+            return {"duplicates_dropped": self.duplicates, "retries_received": self.retries, "tracked": tracked}
@@ -1,19 +1,27 @@
 import os
 import re
 import json
+import asyncio
 import google.generativeai as genai
 from dotenv import load_dotenv
 load_dotenv()
 from datetime import datetime
+import numpy as np
+from notion_table import NotionProjectTable, parse_iso_days
+from project_name_index import tokenize, fuzzy_ratio
+from query_rules import STATUS_VALUES, parse_filter_query
+from gemini_models import model_registry
 from utils import (
     preprocess_relative_dates
 )
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# Cross-check every compiled filter against the row-by-row reference implementation (slow, for debugging)
+NOTION_FILTER_VERIFY = os.getenv("NOTION_FILTER_VERIFY", "false").lower() in ("1", "true", "yes")
 genai.configure(api_key=GEMINI_API_KEY)
 
 
 
-def generate_gemini_parsed_query(user_query):
+async def generate_gemini_parsed_query(user_query):
     field_keys = [
         "project_name", "created_time", "original_due_date", "deployment_date",
         "total_hours", "dev_hours", "qi_hours", "comments", "status"
@@ -23,6 +31,12 @@ def generate_gemini_parsed_query(user_query):
     normalized_query = preprocess_relative_dates(user_query)
     print(f"Normalized query: {normalized_query}")
 
+    # Common shapes ("projects in Pause status", "deployed last month with more than 2 dev hours") need no model call
+    parsed_query = parse_filter_query(normalized_query)
+    if parsed_query is not None:
+        print(f"⚡ Parsed filter locally: {parsed_query}")
+        return parsed_query
+
     current_year = datetime.now().year
 
     # Updated system instruction
@@ -38,7 +52,7 @@ Your task is to convert natural language queries into structured JSON filters us
 5. Text uses `"equals"` or `"contains"`
 6. ❗ If a **date is mentioned without a year**, assume the year is **{current_year}**
 7. The `"status"` field must always use the `"contains"` operator and only include values from this list:
-    - ["Project Setup", "Designer Review", "Lead Dev Review", "AM Review", "Ready To Start", "In Progress", "Pause", "Code Review", "Quality Inspection", "Issues Found", "Dev Fixing Issues", "Need Support", "Ready For Client", "Client Is Reviewing", "Prep for Deployment", "Deployment", "Ready to Deploy", "Done", "Archive", "Design Revision", "Deployed", "Not Started", "Unknown"]
+    - {json.dumps(STATUS_VALUES)}
 """
 
     prompt = f"""
@@ -83,8 +97,8 @@ Now parse the following query and return a valid JSON dictionary using these rul
 Query: "{normalized_query}"
 """
 
-    model = genai.GenerativeModel(model_name="gemini-2.0-flash",system_instruction=system_instruction, tools=[])
-    result = model.generate_content(prompt)
+    model = await asyncio.to_thread(model_registry.get, "gemini-2.0-flash", system_instruction)
+    result = await model.generate_content_async(prompt)
     response_text = result.text.strip()
 
     if response_text.startswith("```json"):
@@ -215,7 +229,120 @@ def convert_parsed_query_to_filter(parsed_query):
 
     return {"and": filters} if filters else {}
 
+DATE_OPERATORS = {"before", "after", "on_or_after", "on_or_before"}
+
+
+class FilterStep:
+    """One operator of one condition, with its target parsed at compile time."""
+
+    def __init__(self, op, target):
+        self.op = op
+        self.target = target
+        self.error = None
+        try:
+            if op in DATE_OPERATORS:
+                self.value = parse_iso_days(target)
+            elif op in ("greater_than", "less_than"):
+                self.value = float(target)
+            elif op in ("contains", "not_contains"):
+                self.value = target.lower()
+            else:
+                self.value = target
+        except Exception as e:
+            # The row-by-row version only failed once a project reached this operator, so defer the error too
+            self.error = e
+
+    def apply(self, table, prop, mask):
+        if self.error is not None:
+            reached = mask
+            if self.op in ("greater_than", "less_than"):
+                # The row-by-row version only parsed the target for projects that have a value, and excluded the rest
+                reached = mask & np.array([bool(v) for v in table.raw(prop)], dtype=bool)
+            if reached.any():
+                raise self.error
+            return mask & False
+        op, value = self.op, self.value
+        if op == "equals":
+            return mask & np.array([v == value for v in table.raw(prop)], dtype=bool)
+        if op == "not_equals":
+            return mask & np.array([v != value for v in table.raw(prop)], dtype=bool)
+        if op == "contains":
+            return mask & (np.char.find(table.lowered(prop), value) >= 0)
+        if op == "not_contains":
+            return mask & (np.char.find(table.lowered(prop), value) < 0)
+        # NaN (missing or unparsable date/number on either side) compares False, which excludes the project
+        if op == "before":
+            return mask & (table.dates(prop) < value)
+        if op == "after":
+            return mask & (table.dates(prop) > value)
+        if op == "on_or_after":
+            return mask & (table.dates(prop) >= value)
+        if op == "on_or_before":
+            return mask & (table.dates(prop) <= value)
+        if op == "greater_than":
+            return mask & (table.numbers(prop) > value)
+        if op == "less_than":
+            return mask & (table.numbers(prop) < value)
+        if op == "project_match":
+            if not value:
+                return mask & False
+            matching = np.zeros(table.size, dtype=bool)
+            matching[list(table.name_index(prop).matching_positions(value))] = True
+            return mask & matching
+        if op == "status_match":
+            # Only a handful of distinct statuses, so match each once and broadcast through the codes
+            distinct, codes = table.categories(prop)
+            return mask & np.array([findStatusMatches(v, value) for v in distinct], dtype=bool)[codes]
+        return mask  # Unknown operators never excluded anything
+
+
+class NotionFilterPlan:
+    """A filter from convert_parsed_query_to_filter compiled into NumPy mask operations over a NotionProjectTable."""
+
+    def __init__(self, filters):
+        self.conditions = []
+        for cond in filters.get("and", []):
+            condition = list(cond.values())[1]  # skip "property" key
+            steps = []
+            if isinstance(condition, dict):
+                for op, target in condition.items():
+                    steps.append(FilterStep(op, target))
+                    if op in ("project_match", "status_match"):
+                        break  # these decide the whole condition; later operators were never evaluated
+            self.conditions.append((cond["property"], steps))
+
+    def mask(self, table):
+        mask = np.ones(table.size, dtype=bool)
+        for prop, steps in self.conditions:
+            for step in steps:
+                mask = step.apply(table, prop, mask)
+        return mask
+
+
+_compiled_plans = {}
+
+def compile_notion_filter(filters):
+    """Returns the NotionFilterPlan for filters, compiling each distinct filter only once."""
+    key = json.dumps(filters, default=str)
+    plan = _compiled_plans.get(key)
+    if plan is None:
+        if len(_compiled_plans) >= 256:
+            _compiled_plans.clear()
+        plan = _compiled_plans[key] = NotionFilterPlan(filters)
+    return plan
+
 def query_notion_projects(filters, all_projects_data):
+    """Returns the projects matching every condition in filters["and"], evaluated as masks over the project table."""
+    table = getattr(all_projects_data, "table", None) or NotionProjectTable(all_projects_data)
+    matching_projects = table.select(compile_notion_filter(filters).mask(table))
+    if NOTION_FILTER_VERIFY:
+        expected = query_notion_projects_reference(filters, all_projects_data)
+        if expected != matching_projects:
+            print(f"❌ Compiled filter disagrees with reference for {filters}: {len(matching_projects)} vs {len(expected)} projects")
+    return matching_projects
+
+def query_notion_projects_reference(filters, all_projects_data):
+    """Row-by-row evaluation the compiled plans must agree with; used when NOTION_FILTER_VERIFY is set."""
     def match_condition(value, condition):
         if isinstance(condition, dict):
             for op, target in condition.items():
@@ -301,21 +428,6 @@ def findStatusMatches(value, target):
     return False
 
 def findMatches(value,target):
-    import re
-    from difflib import get_close_matches
-
-    # Stop words to ignore in tokenization
-    stop_words = {
-        "when", "did", "we", "deploy", "deployed", "the", "to", "of", "on", "in", "for",
-        "hi", "hello", "hey", "there", "how", "are", "you", "what", "is", "this",
-        "project", "about", "can", "tell", "me", "more"
-    }
-
-    # Normalize and tokenize
-    def tokenize(text):
-        words = re.findall(r'\w+', text.lower())
-        return set(word for word in words if word not in stop_words)
-
     query = target
     project_name = value
 
@@ -326,16 +438,14 @@ def findMatches(value,target):
     project_keywords = tokenize(project_name)
 
     # Step 1: Keyword overlap
-    overlap = len(query_keywords & project_keywords)
+    overlap = len(set(query_keywords) & set(project_keywords))
     if overlap > 0:
         return True
 
     # Step 2: Fallback fuzzy match
     normalized_query = ''.join(query_keywords)
     normalized_project = ''.join(project_keywords)
-    matches = get_close_matches(normalized_query, [normalized_project], n=1, cutoff=0.8)
-
-    return bool(matches)
+    return fuzzy_ratio(normalized_query, normalized_project, 0.8) >= 0.8
 
 def format_multiple_projects_flash_message(projects, parsed_query):
     if not projects:
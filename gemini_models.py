@@ -0,0 +1,97 @@
+import os
+import time
+import hashlib
+import datetime
+import threading
+from concurrent.futures import Future
+import google.generativeai as genai
+from google.generativeai import caching
+from dotenv import load_dotenv
+from token_estimate import estimate_tokens
+load_dotenv()
+
+# Register long system instructions as Gemini cached content; "false" keeps the local stand-in (e.g. for tests)
+GEMINI_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "true").lower() in ("1", "true", "yes")
+GEMINI_CACHE_TTL_MINUTES = int(os.getenv("GEMINI_CACHE_TTL_MINUTES", "60"))
+# Gemini refuses to cache fewer input tokens than this
+GEMINI_CACHE_MIN_TOKENS = int(os.getenv("GEMINI_CACHE_MIN_TOKENS", "4096"))
+# Cached content must be created against a pinned model version
+CACHED_MODEL_VERSIONS = {"gemini-2.0-flash": "models/gemini-2.0-flash-001"}
+
+
+def instruction_variant(system_instruction):
+    """Short content hash naming an instruction variant, so an edited instruction gets a new model and cache."""
+    return hashlib.sha256((system_instruction or "").encode("utf-8")).hexdigest()[:12]
+
+
+class ModelRegistry:
+    """GenerativeModel instances reused per (model, instruction variant) instead of being built on every call.
+
+    Instructions long enough to be worth it are registered once as cached content, so requests only send (and pay
+    for) their dynamic tokens. The cache is recreated shortly before its TTL runs out. If caching is disabled or
+    fails, the local stand-in is a plain GenerativeModel holding the instruction, which behaves the same.
+    """
+
+    def __init__(self, use_context_cache=GEMINI_CONTEXT_CACHE, ttl_minutes=GEMINI_CACHE_TTL_MINUTES):
+        self.use_context_cache = use_context_cache
+        self.ttl = datetime.timedelta(minutes=ttl_minutes)
+        self._models = {}  # (model, variant) -> (GenerativeModel, expires at or None)
+        self._building = {}  # (model, variant) -> Future of the model being built
+        self._lock = threading.Lock()
+
+    def get(self, model_name, system_instruction=None):
+        """Blocks while the cache is created over the network, so call it off the event loop (asyncio.to_thread)."""
+        key = (model_name, instruction_variant(system_instruction))
+        with self._lock:
+            entry = self._models.get(key)
+            if entry and (entry[1] is None or time.monotonic() < entry[1]):
+                return entry[0]
+            building = self._building.get(key)
+            if building is not None and entry:
+                # Entries are rebuilt a minute before their cache expires, so the old model is still usable
+                return entry[0]
+            owner = building is None
+            if owner:
+                building = self._building[key] = Future()
+        if not owner:
+            return building.result()
+
+        # Built outside the lock: creating the cache is a network call and other keys must not wait on it
+        try:
+            model, expires_at = self._build(model_name, system_instruction, key[1])
+        except Exception as e:
+            with self._lock:
+                del self._building[key]
+            building.set_exception(e)
+            raise
+        with self._lock:
+            self._models[key] = (model, expires_at)
+            del self._building[key]
+        building.set_result(model)
+        return model
+
+    def _build(self, model_name, system_instruction, variant):
+        if self.use_context_cache and system_instruction and estimate_tokens(system_instruction) >= GEMINI_CACHE_MIN_TOKENS:
+            try:
+                cached = caching.CachedContent.create(
+                    model=CACHED_MODEL_VERSIONS.get(model_name, model_name),
+                    display_name=f"instructions-{variant}",
+                    system_instruction=system_instruction,
+                    ttl=self.ttl,
+                )
+                print(f"🧊 Cached system instruction {variant} for {model_name} ({cached.usage_metadata.total_token_count} tokens)")
+                # Rebuild a minute early so no request lands on an expired cache
+                return genai.GenerativeModel.from_cached_content(cached), time.monotonic() + self.ttl.total_seconds() - 60
+            except Exception as e:
+                print(f"⚠️ Context caching unavailable for {model_name}, sending the instruction inline: {e}")
+                # Try caching again after a TTL instead of on every request
+                model = genai.GenerativeModel(model_name=model_name, system_instruction=system_instruction, tools=[])
+                return model, time.monotonic() + self.ttl.total_seconds()
+        return genai.GenerativeModel(model_name=model_name, system_instruction=system_instruction, tools=[]), None
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+
+model_registry = ModelRegistry()
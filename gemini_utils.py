@@ -3,10 +3,12 @@
 import os
 from dotenv import load_dotenv
 import json
+import asyncio
 import google.generativeai as genai
 load_dotenv()
 
-from system_instruction import get_system_instructions
+from system_instruction import STATIC_SYSTEM_INSTRUCTIONS, get_query_variables
+from gemini_models import model_registry
 from filter_logic import (
     generate_gemini_parsed_query,
     convert_parsed_query_to_filter,
@@ -15,12 +17,34 @@ from filter_logic import (
 )
 from utils import (
     convert_to_slack_message,
-    strip_json_wrapper
+    strip_json_wrapper,
+    SlackMessageStream
 )
+from query_rules import classify_filter_intent
+from prompt_builder import PromptAssembler
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 genai.configure(api_key=GEMINI_API_KEY)
 
-def classify_multiple_projects_query_intent(user_query):
+prompt_assembler = PromptAssembler()
+
+# How many intent classifications the local rules answered vs. sent to Gemini
+intent_stats = {"local": 0, "gemini": 0}
+
+def get_intent_stats():
+    total = intent_stats["local"] + intent_stats["gemini"]
+    return {**intent_stats, "intent_fallback_rate": intent_stats["gemini"] / total if total else 0.0}
+
+async def classify_multiple_projects_query_intent(user_query):
+    """Decides whether a multiple_projects query is a filter query, asking Gemini only when the local rules are unsure."""
+    decision = classify_filter_intent(user_query)
+    if decision is not None:
+        intent_stats["local"] += 1
+        return decision
+    intent_stats["gemini"] += 1
+    print(f"🤔 Intent unclear from rules, asking Gemini (fallback rate {get_intent_stats()['intent_fallback_rate']:.0%})")
+    return await classify_multiple_projects_query_intent_with_gemini(user_query)
+
+async def classify_multiple_projects_query_intent_with_gemini(user_query):
     prompt = f"""
     You are a classification assistant. Decide if the following user query is a filtering-based query.
 
@@ -47,12 +71,12 @@ def classify_multiple_projects_query_intent(user_query):
     Is this query a filtering-based query? Answer with only 'Yes' or 'No'.
     """
 
-    model = genai.GenerativeModel(model_name="gemini-2.0-flash")
-    response = model.generate_content(prompt)
+    model = await asyncio.to_thread(model_registry.get, "gemini-2.0-flash")
+    response = await model.generate_content_async(prompt)
     return response.text.strip().lower().startswith("yes")
 
 
-def get_multiple_projects_from_thread_context(thread_context):
+async def get_multiple_projects_from_thread_context(thread_context):
     try:
         system_instructions = f"""
 You are an expert assistant that extracts all project names from a conversation thread.
@@ -73,10 +97,10 @@ Output:
   ["SF - Inconsistencies 7", "SF - Inconsistencies 5"]
 """
         # Initialize generative model with instructions
-        model = genai.GenerativeModel(model_name="gemini-2.0-flash", system_instruction=system_instructions, tools=[])
+        model = await asyncio.to_thread(model_registry.get, "gemini-2.0-flash", system_instructions)
         # Prepare the prompt with the thread context
         prompt = f"Here is the conversation:\n{thread_context}\n\nReturn a JSON array of all project names mentioned."
-        result = model.generate_content(prompt)
+        result = await model.generate_content_async(prompt)
 
         if result and hasattr(result, "text"):
             try:
@@ -105,7 +129,7 @@ Output:
     
 
 
-def generate_gemini_response(query_type, processed_query, thread_messages, notion_chunks, hubspot_chunks, raw_messages_chunks, transcript_chunks, faq_chunks, internal_slack_messages_chunks, project_name=None, multiple_projects_array=None):
+async def generate_gemini_response(query_type, processed_query, thread_messages, notion_chunks, hubspot_chunks, raw_messages_chunks, transcript_chunks, faq_chunks, internal_slack_messages_chunks, project_name=None, multiple_projects_array=None, on_partial=None):
     """
     Generates a response using the generative AI model based on the provided query and context.
 
@@ -116,6 +140,7 @@ def generate_gemini_response(query_type, processed_query, thread_messages, notio
         notion_chunks, hubspot_chunks, raw_messages_chunks, transcript_chunks, faq_chunks, internal_slack_messages_chunks (list): Data chunks for context.
         project_name (str, optional): Specific project name.
         multiple_projects_array (list, optional): List of multiple project names.
+        on_partial (coroutine function, optional): Streams the response; awaited with the Slack text so far after every chunk.
 
     Returns:
         str: Generated response or error message.
@@ -123,42 +148,52 @@ def generate_gemini_response(query_type, processed_query, thread_messages, notio
     try:
         if multiple_projects_array:
             print("multiple_projects_array", multiple_projects_array)
-        # Generate system instructions for the model
-        system_instructions = get_system_instructions(query_type, False, processed_query, project_name, multiple_projects_array)
-        # Initialize generative model
-        model = genai.GenerativeModel(model_name="gemini-2.0-flash", system_instruction=system_instructions, tools=[])
+        # The static instruction lives in the model (cached content when available); only the variables vary per query
+        model = await asyncio.to_thread(model_registry.get, "gemini-2.0-flash", STATIC_SYSTEM_INSTRUCTIONS)
+        query_variables = get_query_variables(query_type, False, processed_query, project_name, multiple_projects_array)
+        # Fit the retrieved context into the token budget, most relevant chunks first
+        thread_text, context = prompt_assembler.assemble(thread_messages, {
+            "notion": notion_chunks,
+            "hubspot": hubspot_chunks,
+            "raw_messages": raw_messages_chunks,
+            "transcript": transcript_chunks,
+            "internal_slack": internal_slack_messages_chunks,
+            "faq": faq_chunks,
+        }, processed_query)
         # Prepare the prompt with all relevant context
         prompt = f"""
-        QUERY_TYPE = `{query_type}`
-                
-        USER_QUERY = `{processed_query}`
+        {query_variables}
 
         Conversation so far (IMPORTANT‼️: GET CONTEXT FROM HERE):
-        `{thread_messages}`
+        `{thread_text}`
 
         Projects data from Notion:
-        `{notion_chunks if notion_chunks else "No Notion data provided."}`
+        `{context["notion"] or "No Notion data provided."}`
 
         Emails and Communication data from HubSpot:
-        `{hubspot_chunks if hubspot_chunks else "No Emails/HubSpot data provided."}`
+        `{context["hubspot"] or "No Emails/HubSpot data provided."}`
 
         Client/Partner Slack Messages:
-        `{raw_messages_chunks if raw_messages_chunks else "No Client/Partner Slack Messages available."}`
+        `{context["raw_messages"] or "No Client/Partner Slack Messages available."}`
                         
         Meeting transcript highlights:
-        `{transcript_chunks if transcript_chunks else "No transcript info available."}`
+        `{context["transcript"] or "No transcript info available."}`
 
         Internal Slack messages:
-        `{internal_slack_messages_chunks if internal_slack_messages_chunks else "No Internal Slack messages available."}`
+        `{context["internal_slack"] or "No Internal Slack messages available."}`
 
         Question & Answers:
-        `{faq_chunks if faq_chunks else "No Internal Slack messages available."}`
+        `{context["faq"] or "No Internal Slack messages available."}`
         """
         # Generate content using the model
-        result = model.generate_content(prompt)
-        if result and hasattr(result, "text"):
+        if on_partial is None:
+            result = await model.generate_content_async(prompt)
+            text = result.text if result and hasattr(result, "text") else None
+        else:
+            text = await stream_gemini_text(model, prompt, on_partial)
+        if text:
             # Process and return the response
-            response_text = strip_json_wrapper(result.text)
+            response_text = strip_json_wrapper(text)
             return convert_to_slack_message(response_text)
         else:
             # Handle cases where the model does not return a valid response
@@ -169,7 +204,21 @@ def generate_gemini_response(query_type, processed_query, thread_messages, notio
         print(f"❌ Error in generate_gemini_response: {str(e)}")
         return "An error occurred while generating a response."
 
-def generate_custom_filter_response(user_query, notion_chunks):
+async def stream_gemini_text(model, prompt, on_partial):
+    """Streams a generation, awaiting on_partial with the Slack-formatted text so far; returns the full raw text."""
+    stream = SlackMessageStream()
+    pieces = []
+    response = await model.generate_content_async(prompt, stream=True)
+    async for chunk in response:
+        try:
+            piece = chunk.text
+        except ValueError:
+            continue  # a chunk without text parts, e.g. only a finish reason
+        pieces.append(piece)
+        await on_partial(stream.feed(piece))
+    return "".join(pieces)
+
+async def generate_custom_filter_response(user_query, notion_chunks):
     """
     Generates a custom filter response based on the user query and Notion data.
 
@@ -181,7 +230,7 @@ def generate_custom_filter_response(user_query, notion_chunks):
         str: Filtered response or error message.
     """
     try:
-        parsed_query = generate_gemini_parsed_query(user_query)
+        parsed_query = await generate_gemini_parsed_query(user_query)
         notion_filter = convert_parsed_query_to_filter(parsed_query)
         print("notion_filter", notion_filter)
         matching_projects = query_notion_projects(notion_filter, notion_chunks)
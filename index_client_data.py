@@ -1,5 +1,7 @@
 import os
 import re
+import sys
+import hashlib
 import faiss
 import pickle
 import json
@@ -17,6 +19,13 @@ import httplib2
 load_dotenv()
 import time
 import random
+import threading
+from collections import OrderedDict
+from embedding_cache import QueryEmbeddingCache, ChunkEmbeddingStore
+from embedding_engine import BatchEmbedder
+from notion_table import NotionProjects, project_record_text
+from chunk_store import ChunkStore, chunk_store_path, write_chunk_store
+from token_estimate import CHARS_PER_TOKEN
 from document_ids import (
     documents,
     notion_documents,
@@ -29,48 +38,148 @@ from document_ids import (
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GOOGLE_CREDENTIALS =  json.loads(os.getenv("GOOGLE_CREDENTIALS_JSON"))
+# Memory budget for indexes/docstores kept resident by FAISSVectorStore
+FAISS_CACHE_MAX_MB = int(os.getenv("FAISS_CACHE_MAX_MB", "1024"))
+# Map index files read-only instead of copying them onto the heap, so gunicorn workers share page-cache pages
+FAISS_MMAP = os.getenv("FAISS_MMAP", "false").lower() in ("1", "true", "yes")
+# Store vectors as float16 in newly built indexes, halving the bytes on disk and in the page cache
+FAISS_COMPACT_VECTORS = os.getenv("FAISS_COMPACT_VECTORS", "false").lower() in ("1", "true", "yes")
+# IO_FLAG_MMAP_IFC maps flat vector storage zero-copy; older faiss builds only have IO_FLAG_MMAP
+FAISS_MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+EMBEDDING_MODEL = "models/embedding-001"
+SOURCE_TYPES = ["hubspot", "raw_messages", "transcript", "faq", "slack"]
+# Chunk size for indexed documents, and how much of the previous chunk each one repeats
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "512"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "64"))
+# embedding-001 accepts up to 2048 input tokens; longer texts are split and their embeddings averaged
+EMBEDDING_MAX_TOKENS = 2048
+# Threads shared by all searches; faiss releases the GIL while searching, so sources run truly in parallel
+FAISS_SEARCH_WORKERS = int(os.getenv("FAISS_SEARCH_WORKERS", "16"))
+# Notion projects put in the prompt per query: the closest ones by embedding, plus any project named in the thread
+NOTION_TOP_PROJECTS = int(os.getenv("NOTION_TOP_PROJECTS", "15"))
 # Ensure Google Gemini API is properly configured
 genai.configure(api_key=GEMINI_API_KEY)
 
 # 📌 1️⃣ Fetch Google Docs Content
-def get_google_docs_content(doc_id, retries=5, delay=2, timeout=120):
-    """Fetches text content from a Google Doc with retry on rate limits and configurable timeout."""
-    creds = service_account.Credentials.from_service_account_info(
-        GOOGLE_CREDENTIALS, scopes=["https://www.googleapis.com/auth/documents.readonly"]
-    )
-    
-    # Create an HTTP object with a custom timeout
-    http = AuthorizedHttp(creds, http=httplib2.Http(timeout=timeout))
-    service = build("docs", "v1", http=http)
-
-    for attempt in range(retries):
-        try:
-            doc = service.documents().get(documentId=doc_id).execute()
-            break
-        except HttpError as e:
-            if e.resp.status in [403, 429, 500, 503] and attempt < retries - 1:
-                wait = delay * (2 ** attempt) + random.uniform(0, 1)
-                print(f"⏳ Rate limit or server error. Retrying in {wait:.2f} seconds...")
-                time.sleep(wait)
-            else:
-                raise
-        except TimeoutError as e:
-            if attempt < retries - 1:
-                wait = delay * (2 ** attempt) + random.uniform(0, 1)
-                print(f"⏳ Timeout occurred. Retrying in {wait:.2f} seconds...")
-                time.sleep(wait)
-            else:
-                print("❌ Failed to fetch document due to repeated timeouts.")
-                raise
-        except httplib2.ServerNotFoundError as e:
-            if attempt < retries - 1:
-                wait = delay * (2 ** attempt) + random.uniform(0, 1)
-                print(f"⏳ Server not found. Retrying in {wait:.2f} seconds...")
-                time.sleep(wait)
-            else:
-                print("❌ Failed to fetch document due to server not found error.")
-                raise
+class TokenBucket:
+    """Thread-safe token bucket limiter; pause() holds back every caller, e.g. after a 429."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now >= self.paused_until:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    wait = self.paused_until - now
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.updated = self.paused_until
+            self.tokens = 0
+
+
+class GoogleDocsClient:
+    """Docs/Drive client sharing one set of credentials and one rate limiter across fetch threads."""
+
+    def __init__(self, credentials_info, rate_limiter, timeout=120):
+        self.credentials = service_account.Credentials.from_service_account_info(
+            credentials_info,
+            scopes=[
+                "https://www.googleapis.com/auth/documents.readonly",
+                "https://www.googleapis.com/auth/drive.metadata.readonly",
+            ],
+        )
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        # httplib2.Http is not thread-safe, so each thread gets its own authorized client over the shared credentials
+        self._local = threading.local()
+
+    def _service(self, name, version):
+        services = getattr(self._local, "services", None)
+        if services is None:
+            services = self._local.services = {}
+        if (name, version) not in services:
+            http = AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=self.timeout))
+            services[(name, version)] = build(name, version, http=http, cache_discovery=False)
+        return services[(name, version)]
+
+    def _execute(self, make_request, retries=5, delay=2):
+        for attempt in range(retries):
+            self.rate_limiter.acquire()
+            try:
+                return make_request().execute()
+            except HttpError as e:
+                if e.resp.status in [403, 429, 500, 503] and attempt < retries - 1:
+                    retry_after = e.resp.get("retry-after")
+                    wait = float(retry_after) if retry_after and retry_after.isdigit() else delay * (2 ** attempt) + random.uniform(0, 1)
+                    if e.resp.status in [403, 429]:
+                        # Quota is shared by all fetch threads, so everyone backs off together
+                        self.rate_limiter.pause(wait)
+                    print(f"⏳ Rate limit or server error. Retrying in {wait:.2f} seconds...")
+                    time.sleep(wait)
+                else:
+                    raise
+            except TimeoutError as e:
+                if attempt < retries - 1:
+                    wait = delay * (2 ** attempt) + random.uniform(0, 1)
+                    print(f"⏳ Timeout occurred. Retrying in {wait:.2f} seconds...")
+                    time.sleep(wait)
+                else:
+                    print("❌ Failed to fetch document due to repeated timeouts.")
+                    raise
+            except httplib2.ServerNotFoundError as e:
+                if attempt < retries - 1:
+                    wait = delay * (2 ** attempt) + random.uniform(0, 1)
+                    print(f"⏳ Server not found. Retrying in {wait:.2f} seconds...")
+                    time.sleep(wait)
+                else:
+                    print("❌ Failed to fetch document due to server not found error.")
+                    raise
 
+    def get_document(self, doc_id, retries=5, delay=2):
+        return self._execute(lambda: self._service("docs", "v1").documents().get(documentId=doc_id), retries, delay)
+
+    def get_revision(self, doc_id):
+        metadata = self._execute(
+            lambda: self._service("drive", "v3").files().get(fileId=doc_id, fields="version,modifiedTime")
+        )
+        return metadata.get("version") or metadata.get("modifiedTime")
+
+
+GOOGLE_DOCS_FETCH_WORKERS = int(os.getenv("GOOGLE_DOCS_FETCH_WORKERS", "8"))
+# Docs API read quota is 300 requests/minute per user by default
+GOOGLE_API_REQUESTS_PER_SECOND = float(os.getenv("GOOGLE_API_REQUESTS_PER_SECOND", "5"))
+google_api_rate_limiter = TokenBucket(GOOGLE_API_REQUESTS_PER_SECOND)
+_google_docs_client = None
+_google_docs_client_lock = threading.Lock()
+
+def get_google_docs_client():
+    global _google_docs_client
+    with _google_docs_client_lock:
+        if _google_docs_client is None:
+            _google_docs_client = GoogleDocsClient(GOOGLE_CREDENTIALS, google_api_rate_limiter)
+        return _google_docs_client
+
+def get_google_docs_content(doc_id, retries=5, delay=2):
+    """Fetches text content from a Google Doc with retry on rate limits."""
+    doc = get_google_docs_client().get_document(doc_id, retries, delay)
     content = ""
     for element in doc.get("body", {}).get("content", []):
         if "paragraph" in element:
@@ -79,23 +188,145 @@ def get_google_docs_content(doc_id, retries=5, delay=2, timeout=120):
                     content += text_run["textRun"]["content"]
     return content.strip()
 
+def get_google_doc_revision(doc_id):
+    """Returns the Drive version of a Google Doc, or None when it cannot be read (callers then compare content hashes)."""
+    try:
+        return get_google_docs_client().get_revision(doc_id)
+    except Exception as e:
+        print(f"⚠️ Could not read revision of {doc_id}: {e}")
+        return None
+
+def fetch_if_changed(doc_id, revision, content_hash):
+    """Returns (text, revision), with text None when the doc still matches the given revision or content hash."""
+    current_revision = get_google_doc_revision(doc_id)
+    if revision and current_revision == revision:
+        return None, current_revision
+    text = get_google_docs_content(doc_id)
+    if content_hash and hash_text(text) == content_hash:
+        return None, current_revision
+    return text, current_revision
+
 # 📌 2️⃣ Text Chunking for Better Retrieval
-def chunk_text(text, max_size=5000, overlap=2000):
-    """Splits text into smaller chunks (e.g., 500 characters) for better retrieval."""
-    return [text[i:i + max_size] for i in range(0, len(text), max_size)]
+# Boundaries from strongest to weakest: paragraphs, lines (one Slack message each), sentences, words.
+# Text is always split down to sentences; words are only split apart when a sentence alone is too big.
+_CHUNK_SEPARATORS = [
+    (re.compile(r"\n\s*\n"), "\n\n"),
+    (re.compile(r"\n"), "\n"),
+    (re.compile(r"(?<=[.!?])\s+"), " "),
+    (re.compile(r"\s+"), " "),
+]
+_SENTENCE_LEVEL = 2
+
+def _iter_units(text, max_chars, level=0, trailing=("", -1)):
+    """Yields [unit, separator, strength] triples, where separator/strength describe the boundary after the unit."""
+    if level == len(_CHUNK_SEPARATORS):
+        pieces = [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+        for i, piece in enumerate(pieces):
+            yield [piece, *(trailing if i == len(pieces) - 1 else ("", -1))]
+        return
+    pattern, separator = _CHUNK_SEPARATORS[level]
+    strength = len(_CHUNK_SEPARATORS) - 1 - level
+    parts = [part.strip() for part in pattern.split(text)]
+    parts = [part for part in parts if part]
+    for i, part in enumerate(parts):
+        boundary = trailing if i == len(parts) - 1 else (separator, strength)
+        if level < _SENTENCE_LEVEL or len(part) > max_chars:
+            yield from _iter_units(part, max_chars, level + 1, boundary)
+        else:
+            yield [part, *boundary]
+
+def _units_size(units):
+    return sum(len(unit) + len(separator) for unit, separator, _ in units) - len(units[-1][1]) if units else 0
+
+def _join_units(units):
+    return "".join(unit + separator for unit, separator, _ in units[:-1]) + units[-1][0]
+
+def _best_cut(units, max_chars):
+    """Index to cut units at: the strongest boundary in the second half of the chunk, latest on ties."""
+    best, best_strength, size = len(units), -2, 0
+    for i, (unit, separator, strength) in enumerate(units[:-1], start=1):
+        size += len(unit) + len(separator)
+        if size >= max_chars // 2 and strength >= best_strength:
+            best, best_strength = i, strength
+    return best
+
+def _tail(text, max_chars):
+    """The end of text, at most max_chars long, starting at a word boundary when there is one."""
+    if len(text) <= max_chars:
+        return text
+    tail = text[-max_chars:]
+    space = tail.find(" ")
+    return tail[space + 1:] if 0 <= space < len(tail) - 1 else tail
+
+def iter_chunks(text, max_tokens=CHUNK_MAX_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    """Lazily yields chunks of at most max_tokens that end on paragraph/message/sentence boundaries.
+
+    Each chunk after the first repeats the trailing sentences of the previous one, up to overlap_tokens; when the
+    last sentence alone is longer than that (typical of Slack export lines), its trailing words are repeated instead.
+    """
+    text = text.strip()
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        if text:
+            yield text
+        return
+
+    overlap_chars = overlap_tokens * CHARS_PER_TOKEN
+    units = []
+    fresh = 0  # units not yet emitted in an earlier chunk
+    for unit in _iter_units(text, max_chars):
+        while units and _units_size(units + [unit]) > max_chars:
+            cut = _best_cut(units, max_chars)
+            yield _join_units(units[:cut])
+            carried, rest = [], units[cut:]
+            for previous in reversed(units[:cut]):
+                if _units_size([previous] + carried) > overlap_chars or _units_size([previous] + carried + rest + [unit]) > max_chars:
+                    break
+                carried.insert(0, previous)
+            if not carried and overlap_chars:
+                previous, separator, strength = units[cut - 1]
+                room = min(overlap_chars, max_chars - len(separator) - _units_size(rest + [unit]))
+                if room > 0:
+                    carried = [[_tail(previous, room), separator, strength]]
+            units, fresh = carried + rest, len(rest)
+        units.append(unit)
+        fresh += 1
+    if fresh:
+        yield _join_units(units)
+
+def chunk_text(text, max_tokens=CHUNK_MAX_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    """Splits text into overlapping, boundary-aligned chunks for better retrieval."""
+    return list(iter_chunks(text, max_tokens, overlap_tokens))
 
 # 📌 3️⃣ Get Embeddings from Gemini
-def get_gemini_embedding(text, retries=5, delay=2):
-    """Generate embeddings for text using Google Gemini, handling large texts and rate limits."""
-    model = "models/embedding-001"
-    text_chunks = chunk_text(text)
-    embeddings = []
-
-    for chunk in text_chunks:
+_chunk_embedding_store = None
+_chunk_embedding_store_lock = threading.Lock()
+
+def get_chunk_embedding_store():
+    global _chunk_embedding_store
+    with _chunk_embedding_store_lock:
+        if _chunk_embedding_store is None:
+            _chunk_embedding_store = ChunkEmbeddingStore()
+        return _chunk_embedding_store
+
+def get_gemini_embedding(text, retries=5, delay=2, store=None):
+    """Generate embeddings for text using Google Gemini, handling large texts and rate limits.
+
+    Only indexing code should pass the chunk embedding store: it is never evicted, so serve-time texts stay out of it.
+    """
+    model = EMBEDDING_MODEL
+    text_chunks = chunk_text(text, EMBEDDING_MAX_TOKENS, 0)
+    embeddings = store.get_many(text_chunks, model, "retrieval_document") if store is not None else [None] * len(text_chunks)
+
+    for position, chunk in enumerate(text_chunks):
+        if embeddings[position] is not None:
+            continue
         for attempt in range(retries):
             try:
                 response = genai.embed_content(model=model, content=chunk, task_type="retrieval_document")
-                embeddings.append(response["embedding"])
+                embeddings[position] = response["embedding"]
+                if store is not None:
+                    store.put_many([chunk], [response["embedding"]], model, "retrieval_document")
                 break  # Exit retry loop on success
             except google.api_core.exceptions.ResourceExhausted as e:
                 if attempt < retries - 1:
@@ -113,9 +344,49 @@ def get_gemini_embedding(text, retries=5, delay=2):
     avg_embedding = [sum(col) / len(col) for col in zip(*embeddings)]
     return avg_embedding
 
+# Query embeddings shared by every search, so "Regenerate" and repeated questions skip the embedding call
+query_embedding_cache = QueryEmbeddingCache()
+
+def get_query_embedding(query):
+    """Returns the embedding for a search query, serving repeats from query_embedding_cache (in memory only)."""
+    embedding = query_embedding_cache.get(query, EMBEDDING_MODEL)
+    if embedding is None:
+        embedding = get_gemini_embedding(query)
+        query_embedding_cache.put(query, EMBEDDING_MODEL, embedding)
+        print(f"🧠 Query embedding cache miss {query_embedding_cache.stats()}")
+    else:
+        print(f"🧠 Query embedding cache hit {query_embedding_cache.stats()}")
+    return embedding
+
+def gemini_embed_batch(texts):
+    response = genai.embed_content(model=EMBEDDING_MODEL, content=texts, task_type="retrieval_document")
+    return response["embedding"]
+
+# One engine for the whole indexing run, so the concurrency learned from quota errors carries across indexes
+embedding_engine = BatchEmbedder(gemini_embed_batch)
+
 def get_gemini_embedding_parallel(text_chunks):
-    with ThreadPoolExecutor() as executor:
-        results = list(executor.map(get_gemini_embedding, text_chunks))
+    """Embeds many texts in batched requests; texts longer than one chunk get the average of their chunk embeddings."""
+    pieces = [chunk_text(text, EMBEDDING_MAX_TOKENS, 0) for text in text_chunks]
+    flat_pieces = [piece for chunks in pieces for piece in chunks]
+
+    # Only chunks never embedded before go to the API
+    store = get_chunk_embedding_store()
+    vectors = store.get_many(flat_pieces, EMBEDDING_MODEL, "retrieval_document")
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    print(f"🗃️ {len(flat_pieces) - len(missing)}/{len(flat_pieces)} chunk embeddings reused from {store.path}")
+    if missing:
+        new_vectors = embedding_engine.embed([flat_pieces[i] for i in missing])
+        store.put_many([flat_pieces[i] for i in missing], new_vectors, EMBEDDING_MODEL, "retrieval_document")
+        for i, vector in zip(missing, new_vectors):
+            vectors[i] = vector
+
+    results = []
+    position = 0
+    for chunks in pieces:
+        group = vectors[position:position + len(chunks)]
+        position += len(chunks)
+        results.append([sum(col) / len(col) for col in zip(*group)])
     return results
 
 
@@ -270,29 +541,161 @@ def parse_project_data(doc_text):
 
     return projects
 
+def new_faiss_index(dimension):
+    """Creates an empty ID-mapped index, with float16 vector storage when FAISS_COMPACT_VECTORS is set.
+
+    Vectors are stored flat rather than in an HNSW graph because HNSW cannot remove_ids,
+    which incremental re-indexing needs to drop stale chunks.
+    """
+    if FAISS_COMPACT_VECTORS:
+        return faiss.IndexIDMap2(faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_fp16))
+    return faiss.IndexIDMap2(faiss.IndexFlatL2(dimension))
+
+def hash_text(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
 # 📌 4️⃣ FAISS Vector Store Class
 class FAISSVectorStore:
-    def __init__(self, index_dir="faiss_index"):
+    def __init__(self, index_dir="faiss_index", cache_max_bytes=FAISS_CACHE_MAX_MB * 1024 * 1024, mmap=FAISS_MMAP):
         self.indexes = {}
         self.docstores = {}
         self.index_dir = index_dir
+        self.cache_max_bytes = cache_max_bytes
+        self.mmap = mmap
+        # name -> {"mtimes": (index mtime, docstore mtime), "nbytes": int}, least recently used first
+        self._cache_entries = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._load_locks = {}
+        self._fetches = {}
+        # json path -> (mtime, NotionProjects)
+        self._notion_tables = {}
+        self._search_executor = ThreadPoolExecutor(max_workers=FAISS_SEARCH_WORKERS, thread_name_prefix="faiss-search")
         os.makedirs(self.index_dir, exist_ok=True)
 
+    def _index_paths(self, name):
+        """Returns the index path and the docstore path, preferring the chunk store over a legacy pickle."""
+        index_path = os.path.join(self.index_dir, f"{name}.faiss")
+        docstore_path = chunk_store_path(os.path.join(self.index_dir, name))
+        legacy_path = os.path.join(self.index_dir, f"{name}_docstore.pkl")
+        if not os.path.exists(docstore_path) and os.path.exists(legacy_path):
+            return index_path, legacy_path
+        return index_path, docstore_path
+
+    def _read_docstore(self, docstore_path):
+        if docstore_path.endswith(".pkl"):
+            print(f"⚠️ Loading legacy pickle docstore {docstore_path}; run `python chunk_store.py migrate` to convert it.")
+            with open(docstore_path, "rb") as f:
+                return pickle.load(f)
+        return ChunkStore(docstore_path)
+
+    def _write_docstore(self, name, docstore):
+        write_chunk_store(os.path.join(self.index_dir, name), docstore)
+
+    def _remove_index_files(self, name):
+        for path in (
+            os.path.join(self.index_dir, f"{name}.faiss"),
+            chunk_store_path(os.path.join(self.index_dir, name)),
+            os.path.join(self.index_dir, f"{name}_docstore.pkl"),
+        ):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _read_index_files(self, name):
+        """Read a FAISS index and its document store from disk, returning (None, None) if either is missing."""
+        index_path, docstore_path = self._index_paths(name)
+        if not os.path.exists(index_path):
+            print(f"⚠️ No FAISS index found for {name}.")
+            return None, None
+        if not os.path.exists(docstore_path):
+            print(f"⚠️ No document store found for {name}.")
+            return None, None
+        if self.mmap:
+            index = faiss.read_index(index_path, FAISS_MMAP_FLAGS)
+        else:
+            index = faiss.read_index(index_path)
+        return index, self._read_docstore(docstore_path)
+
     def load_index(self, client_name):
         """Load FAISS index and document store from disk."""
-        index_path = os.path.join(self.index_dir, f"{client_name}.faiss")
-        docstore_path = os.path.join(self.index_dir, f"{client_name}_docstore.pkl")
-        if os.path.exists(index_path):
-            self.indexes[client_name] = faiss.read_index(index_path)
-            if os.path.exists(docstore_path):
-                with open(docstore_path, "rb") as f:
-                    self.docstores[client_name] = pickle.load(f)
-                print(f"🔃 FAISS index loaded for {client_name}")
-            else:
-                print(f"⚠️ No document store found for {client_name}.")
-        else:
-            print(f"⚠️ No FAISS index found for {client_name}.")
+        index, docstore = self._read_index_files(client_name)
+        if index is None:
+            return False
+        self.indexes[client_name] = index
+        self.docstores[client_name] = docstore
+        print(f"🔃 FAISS index loaded for {client_name}")
+        return True
+
+    def _get_cached_index(self, name):
+        """Return the resident (index, docstore) for name, loading lazily and reloading when the files change on disk."""
+        index_path, docstore_path = self._index_paths(name)
+        try:
+            mtimes = (os.path.getmtime(index_path), os.path.getmtime(docstore_path))
+        except OSError:
+            return None, None
+
+        with self._cache_lock:
+            entry = self._cache_entries.get(name)
+            if entry and entry["mtimes"] == mtimes:
+                self._cache_entries.move_to_end(name)
+                return self.indexes[name], self.docstores[name]
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # Load outside the cache lock so other clients keep searching while this one reads from disk
+        with load_lock:
+            with self._cache_lock:
+                entry = self._cache_entries.get(name)
+                if entry and entry["mtimes"] == mtimes:
+                    self._cache_entries.move_to_end(name)
+                    return self.indexes[name], self.docstores[name]
+
+            index, docstore = self._read_index_files(name)
+            if index is None:
+                return None, None
+            # Mapped files live in the shared page cache; only heap copies count against this worker
+            nbytes = os.path.getsize(docstore_path) if docstore_path.endswith(".pkl") else 0
+            if not self.mmap:
+                nbytes += os.path.getsize(index_path)
+
+            with self._cache_lock:
+                self.indexes[name] = index
+                self.docstores[name] = docstore
+                self._cache_entries[name] = {"mtimes": mtimes, "nbytes": nbytes}
+                self._cache_entries.move_to_end(name)
+                self._evict_over_budget()
+            print(f"🔃 FAISS index cached for {name} ({nbytes / 1024 / 1024:.1f} MB)")
+            return index, docstore
+
+    def _evict_over_budget(self):
+        """Drop least recently used indexes until the cache fits its memory budget. Caller holds _cache_lock."""
+        total = sum(entry["nbytes"] for entry in self._cache_entries.values())
+        while total > self.cache_max_bytes and len(self._cache_entries) > 1:
+            name, entry = self._cache_entries.popitem(last=False)
+            self.indexes.pop(name, None)
+            self.docstores.pop(name, None)
+            total -= entry["nbytes"]
+            print(f"♻️ Evicted FAISS index for {name} from cache")
+
+    def map_all_indexes(self):
+        """Maps every index in index_dir into the cache and prints the mapped bytes per client."""
+        mapped_bytes = {}
+        for file in sorted(os.listdir(self.index_dir)):
+            if not file.endswith(".faiss"):
+                continue
+            name = file[:-len(".faiss")]
+            if self._get_cached_index(name)[0] is None:
+                continue
+            client = name
+            for prefix in SOURCE_TYPES:
+                if name.endswith(f"_{prefix}"):
+                    client = name[:-len(prefix) - 1]
+                    break
+            mapped_bytes[client] = mapped_bytes.get(client, 0) + os.path.getsize(os.path.join(self.index_dir, file))
 
+        mode = "mmap" if self.mmap else "heap"
+        for client, nbytes in mapped_bytes.items():
+            print(f"🗺️ {client}: {nbytes / 1024 / 1024:.1f} MB of FAISS indexes loaded ({mode})")
+        print(f"🗺️ Total: {sum(mapped_bytes.values()) / 1024 / 1024:.1f} MB across {len(mapped_bytes)} clients")
+        return mapped_bytes
 
     def save_index(self, client_name):
         """Save FAISS index and document store to disk."""
@@ -300,25 +703,59 @@ class FAISSVectorStore:
             print(f"⚠️ No FAISS index found for {client_name}. Skipping save.")
             return
         index_path = os.path.join(self.index_dir, f"{client_name}.faiss")
-        docstore_path = os.path.join(self.index_dir, f"{client_name}_docstore.pkl")
         faiss.write_index(self.indexes[client_name], index_path)
-        with open(docstore_path, "wb") as f:
-            pickle.dump(self.docstores[client_name], f)
+        self._write_docstore(client_name, self.docstores[client_name])
         print(f"💾 FAISS index saved for {client_name}")
 
-    def create_index(self, documents):
-        self._clear_index_dir()
-        
-        docs_by_client = self._organize_google_docs(documents)
-        self._process_notion_documents(notion_documents)
-        
-        self._process_special_documents(hubspot_documents, "hubspot")
-        self._process_special_documents(raw_messages_documents, "raw_messages")
-        self._process_special_documents(transcript_documents, "transcript")
-        self._process_special_documents(faq_documents, "faq")
-        self._process_special_documents(internal_slack_messages_documents, "slack")
-        
-        self._process_client_documents(docs_by_client)
+    def create_index(self, documents, full_rebuild=False):
+        """Brings the index directory up to date, re-embedding only documents and chunks that changed since the last run."""
+        if full_rebuild:
+            self._clear_index_dir()
+
+        manifest = self._load_manifest()
+        # Forget indexes missing on disk before prefetching, so their docs are fetched without the old records
+        for index_name in list(manifest["indexes"]):
+            self._reset_untracked_index(index_name, manifest)
+        with ThreadPoolExecutor(max_workers=GOOGLE_DOCS_FETCH_WORKERS, thread_name_prefix="docs-fetch") as executor:
+            # Every fetch starts now; each indexing stage below picks its docs up as they arrive
+            self._fetches = self._start_fetches(executor, manifest, [
+                (notion_documents, "notion"),
+                (hubspot_documents, "hubspot"),
+                (raw_messages_documents, "raw_messages"),
+                (transcript_documents, "transcript"),
+                (faq_documents, "faq"),
+                (internal_slack_messages_documents, "slack"),
+                (documents, "document"),
+            ])
+            try:
+                self._process_notion_documents(notion_documents, manifest)
+
+                self._process_special_documents(hubspot_documents, "hubspot", manifest)
+                self._process_special_documents(raw_messages_documents, "raw_messages", manifest)
+                self._process_special_documents(transcript_documents, "transcript", manifest)
+                self._process_special_documents(faq_documents, "faq", manifest)
+                self._process_special_documents(internal_slack_messages_documents, "slack", manifest)
+
+                self._process_client_documents(documents, manifest)
+            finally:
+                for future in self._fetches.values():
+                    future.cancel()
+                self._fetches = {}
+        print(f"📈 Embedding throughput for this run: {embedding_engine.report()}")
+
+
+    def _start_fetches(self, executor, manifest, document_groups):
+        fetches = {}
+        for document_list, doc_type in document_groups:
+            for doc in document_list:
+                doc_key = f"{doc_type}:{doc['docId']}"
+                if doc_type == "notion" and not os.path.exists(os.path.join(self.index_dir, f"{doc['clientName']}_notion.json")):
+                    manifest["docs"].pop(doc_key, None)
+                record = manifest["docs"].get(doc_key) or {}
+                fetches[doc_key] = executor.submit(
+                    fetch_if_changed, doc["docId"], record.get("revision"), record.get("content_hash")
+                )
+        return fetches
 
 
     def _clear_index_dir(self):
@@ -329,135 +766,271 @@ class FAISSVectorStore:
         print(f"🗑️ Cleared existing files in {self.index_dir}.")
 
 
-    def _organize_google_docs(self, documents):
-        docs_by_client = {}
-        for doc in documents:
-            client = doc["clientName"]
-            doc_id = doc["docId"]
-            text = get_google_docs_content(doc_id)
-            if not text.strip():
-                print(f"⚠️ Empty document: {doc_id} ({client}) - Skipping.")
-                continue
-            docs_by_client.setdefault(client, []).append(text)
-        return docs_by_client
+    def _manifest_path(self):
+        return os.path.join(self.index_dir, "index_manifest.json")
+
+    def _load_manifest(self):
+        """Loads the record of indexed revisions, content hashes and chunk ids from the last run."""
+        if os.path.exists(self._manifest_path()):
+            with open(self._manifest_path(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {"docs": {}, "indexes": {}}
+
+    def _save_manifest(self, manifest):
+        tmp_path = self._manifest_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self._manifest_path())
+
+
+    def _fetch_if_changed(self, doc_id, doc_key, manifest):
+        """Waits for the doc's prefetch and returns (text, revision), or (None, revision) when it is unchanged."""
+        future = self._fetches.get(doc_key)
+        if future is None:
+            record = manifest["docs"].get(doc_key) or {}
+            text, revision = fetch_if_changed(doc_id, record.get("revision"), record.get("content_hash"))
+        else:
+            text, revision = future.result()
+        if text is None and doc_key in manifest["docs"]:
+            manifest["docs"][doc_key]["revision"] = revision
+        return text, revision
 
 
-    def _process_notion_documents(self, notion_documents):
+    def _process_notion_documents(self, notion_documents, manifest):
         for doc in notion_documents:
             client = doc["clientName"]
             doc_id = doc["docId"]
-            text = get_google_docs_content(doc_id)
+            doc_key = f"notion:{doc_id}"
+            file_path = os.path.join(self.index_dir, f"{client}_notion.json")
+            text, revision = self._fetch_if_changed(doc_id, doc_key, manifest)
+            if text is None:
+                if os.path.exists(file_path) and not os.path.exists(self._notion_vectors_path(client)):
+                    # Table parsed before project embeddings existed
+                    with open(file_path, "r", encoding="utf-8") as f:
+                        self._save_notion_vectors(client, json.load(f))
+                print(f"⏭️ Notion document unchanged: {doc_id} ({client})")
+                continue
             if not text.strip():
                 print(f"⚠️ Empty notion document: {doc_id} ({client}) - Skipping.")
                 continue
             project_data = parse_project_data(text)
-            file_path = os.path.join("faiss_index", f"{client}_notion.json")
             # Save the list of dictionaries as a JSON array
             with open(file_path, "w", encoding="utf-8") as f:
                 json.dump(project_data, f, indent=4)
+            self._save_notion_vectors(client, project_data)
+            manifest["docs"][doc_key] = {"client": client, "revision": revision, "content_hash": hash_text(text)}
+            self._save_manifest(manifest)
             print(f"JSON data saved to {file_path}")
 
 
-    def _process_special_documents(self, document_list, doc_type):
-        for doc in document_list:
-            client = doc["clientName"]
-            doc_id = doc["docId"]
-            text = get_google_docs_content(doc_id)
-            if not text.strip():
-                print(f"⚠️ Empty {doc_type} document: {doc_id} ({client}) - Skipping.")
-                continue
+    def _notion_vectors_path(self, client_name):
+        return os.path.join(self.index_dir, f"{client_name}_notion_vectors.npy")
 
-            chunks = chunk_text(text)
-            embeddings = get_gemini_embedding_parallel(chunks)
-            dimension = len(embeddings[0])
+    def _save_notion_vectors(self, client_name, projects):
+        """Embeds every project record; row i of the saved matrix belongs to project i of {client}_notion.json."""
+        vectors = np.asarray(get_gemini_embedding_parallel([project_record_text(p) for p in projects]), dtype=np.float32)
+        path = self._notion_vectors_path(client_name)
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, vectors)
+        os.replace(path + ".tmp", path)
+        print(f"💾 Embedded {len(projects)} Notion projects for {client_name}")
 
-            index_path = os.path.join(self.index_dir, f"{client}_{doc_type}.faiss")
-            docstore_path = os.path.join(self.index_dir, f"{client}_{doc_type}_docstore.pkl")
 
-            if os.path.exists(index_path):
-                index = faiss.read_index(index_path)
-                with open(docstore_path, "rb") as f:
-                    docstore = pickle.load(f)
-            else:
-                index = faiss.IndexHNSWFlat(dimension, 32)
-                docstore = {}
+    def _process_special_documents(self, document_list, doc_type, manifest):
+        self._sync_documents(document_list, doc_type, lambda client: f"{client}_{doc_type}", manifest)
 
-            index.add(np.array(embeddings, dtype=np.float32))
-            for i, chunk in enumerate(chunks):
-                docstore[len(docstore)] = chunk
 
-            faiss.write_index(index, index_path)
-            with open(docstore_path, "wb") as f:
-                pickle.dump(docstore, f)
-            print(f"💾 FAISS index created/updated for {doc_type} of {client} with {len(chunks)} chunks.")
+    def _process_client_documents(self, documents, manifest):
+        self._sync_documents(documents, "document", lambda client: client, manifest)
+
+
+    def _sync_documents(self, document_list, doc_type, index_name_for, manifest):
+        docs_by_index = {}
+        for doc in document_list:
+            docs_by_index.setdefault(index_name_for(doc["clientName"]), []).append(doc)
+
+        # Indexes whose documents were all removed from document_ids.py still need their vectors dropped
+        for record in manifest["docs"].values():
+            if record.get("doc_type") == doc_type:
+                docs_by_index.setdefault(record["index"], [])
 
+        for index_name, docs in docs_by_index.items():
+            self._sync_index(index_name, docs, doc_type, manifest)
 
-    def _process_client_documents(self, docs_by_client):
-        for client, docs in docs_by_client.items():
-            print(f"📌 Indexing {len(docs)} documents for {client}...")
-            all_chunks = []
-            chunk_map = {}
 
-            for doc in docs:
-                chunks = chunk_text(doc)
-                for chunk in chunks:
-                    chunk_map[len(all_chunks)] = chunk
-                    all_chunks.append(chunk)
+    def _reset_untracked_index(self, index_name, manifest):
+        """Rebuilds index_name from scratch if the manifest and the index directory disagree about it."""
+        index_path, _ = self._index_paths(index_name)
+        if (index_name in manifest["indexes"]) == os.path.exists(index_path):
+            return
+        # Index built before incremental indexing existed, or deleted behind the manifest's back:
+        # there are no chunk ids to diff against, so rebuild it from scratch
+        print(f"♻️ Rebuilding untracked index {index_name}")
+        self._remove_index_files(index_name)
+        manifest["indexes"].pop(index_name, None)
+        for doc_key, record in list(manifest["docs"].items()):
+            if record.get("index") == index_name:
+                del manifest["docs"][doc_key]
+                # A prefetch started with the old record would report the doc unchanged; fetch it again
+                future = self._fetches.pop(doc_key, None)
+                if future is not None:
+                    future.cancel()
+
+    def _sync_index(self, index_name, docs, doc_type, manifest):
+        """Re-embeds changed chunks of one index and removes the vectors of chunks that no longer exist."""
+        index_path, docstore_path = self._index_paths(index_name)
+        self._reset_untracked_index(index_name, manifest)
+        index_record = manifest["indexes"].setdefault(index_name, {"next_id": 0})
+
+        listed_keys = set()
+        removed_ids = []
+        pending = []  # (doc_key, chunk_hash, chunk)
+        for doc in docs:
+            client = doc["clientName"]
+            doc_id = doc["docId"]
+            doc_key = f"{doc_type}:{doc_id}"
+            listed_keys.add(doc_key)
 
-            embeddings = get_gemini_embedding_parallel(all_chunks)
-            dimension = len(embeddings[0])
-            index = faiss.IndexHNSWFlat(dimension, 32)
-            index.add(np.array(embeddings, dtype=np.float32))
+            text, revision = self._fetch_if_changed(doc_id, doc_key, manifest)
+            if text is None:
+                print(f"⏭️ {doc_type} document unchanged: {doc_id} ({client})")
+                continue
 
-            self.indexes[client] = index
-            self.docstores[client] = chunk_map
-            print(f"✅ FAISS index created for {client} with {len(all_chunks)} chunks.")
-            self.save_index(client)
+            record = manifest["docs"].get(doc_key)
+            old_chunks = record["chunks"] if record else {}
+            if not text.strip():
+                print(f"⚠️ Empty {doc_type} document: {doc_id} ({client}) - Skipping.")
+                removed_ids.extend(old_chunks.values())
+                manifest["docs"].pop(doc_key, None)
+                continue
+
+            kept_chunks = {}
+            for chunk in iter_chunks(text):
+                chunk_hash = hash_text(chunk)
+                if chunk_hash in kept_chunks:
+                    continue
+                if chunk_hash in old_chunks:
+                    kept_chunks[chunk_hash] = old_chunks[chunk_hash]
+                else:
+                    kept_chunks[chunk_hash] = None
+                    pending.append((doc_key, chunk_hash, chunk))
+            removed_ids.extend(vid for chunk_hash, vid in old_chunks.items() if chunk_hash not in kept_chunks)
+            manifest["docs"][doc_key] = {
+                "client": client,
+                "doc_type": doc_type,
+                "index": index_name,
+                "revision": revision,
+                "content_hash": hash_text(text),
+                "chunks": kept_chunks,
+            }
+
+        for doc_key, record in list(manifest["docs"].items()):
+            if record.get("index") == index_name and doc_key not in listed_keys:
+                print(f"🗑️ Removing {doc_key} from {index_name}")
+                removed_ids.extend(record["chunks"].values())
+                del manifest["docs"][doc_key]
+
+        if not pending and not removed_ids:
+            print(f"✅ {index_name} is up to date.")
+            self._save_manifest(manifest)
+            return
+
+        if os.path.exists(index_path):
+            index = faiss.read_index(index_path)
+            docstore = dict(self._read_docstore(docstore_path).items())
+        else:
+            index = None
+            docstore = {}
+
+        if removed_ids and index is not None:
+            index.remove_ids(np.array(removed_ids, dtype=np.int64))
+        for vid in removed_ids:
+            docstore.pop(vid, None)
+
+        if pending:
+            embeddings = np.array(get_gemini_embedding_parallel([chunk for _, _, chunk in pending]), dtype=np.float32)
+            if index is None:
+                index = new_faiss_index(embeddings.shape[1])
+            first_id = index_record["next_id"]
+            ids = np.arange(first_id, first_id + len(pending), dtype=np.int64)
+            index.add_with_ids(embeddings, ids)
+            for vid, (doc_key, chunk_hash, chunk) in zip(ids.tolist(), pending):
+                docstore[vid] = chunk
+                manifest["docs"][doc_key]["chunks"][chunk_hash] = vid
+            index_record["next_id"] = first_id + len(pending)
+
+        if index is None or index.ntotal == 0:
+            self._remove_index_files(index_name)
+            del manifest["indexes"][index_name]
+            print(f"🗑️ {index_name} has no documents left, removed it.")
+        else:
+            faiss.write_index(index, index_path)
+            self._write_docstore(index_name, docstore)
+            legacy_path = os.path.join(self.index_dir, f"{index_name}_docstore.pkl")
+            if os.path.exists(legacy_path):
+                os.remove(legacy_path)
+            print(f"💾 FAISS index updated for {index_name}: {len(pending)} chunks embedded, {len(removed_ids)} removed, {index.ntotal} total.")
+        self._save_manifest(manifest)
 
     def _load_notion_json(self, client_name, prefix):
+        """Returns the client's projects as a NotionProjects list, parsed once and reloaded when the JSON file changes."""
         json_path = os.path.join(self.index_dir, f"{client_name}_{prefix}.json")
-        if os.path.exists(json_path):
-            with open(json_path, "r", encoding="utf-8") as f:
-                data = json.load(f)  # Load JSON as a single array
-                return {"notion_chunks": data}  # Wrap it in a dictionary
-        else:
+        vectors_path = self._notion_vectors_path(client_name)
+        try:
+            mtime = os.path.getmtime(json_path)
+        except OSError:
             print(f"⚠️ No JSON file found for {prefix} of {client_name}.")
             return {"notion_chunks": []}  # Return an empty dictionary
+        vectors_mtime = os.path.getmtime(vectors_path) if os.path.exists(vectors_path) else None
+
+        with self._cache_lock:
+            cached = self._notion_tables.get(json_path)
+        if cached and cached[0] == (mtime, vectors_mtime):
+            return {"notion_chunks": cached[1]}
+
+        with open(json_path, "r", encoding="utf-8") as f:
+            project_data = json.load(f)  # Load JSON as a single array
+        vectors = None
+        if vectors_mtime is not None:
+            vectors = np.load(vectors_path, mmap_mode="r" if self.mmap else None)
+            if len(vectors) != len(project_data):
+                print(f"⚠️ {vectors_path} is out of date with {json_path}, ignoring it")
+                vectors = None
+        projects = NotionProjects(project_data, vectors)
+        with self._cache_lock:
+            self._notion_tables[json_path] = ((mtime, vectors_mtime), projects)
+        print(f"🔃 Notion table loaded for {client_name} ({len(projects)} projects)")
+        return {"notion_chunks": projects}  # Wrap it in a dictionary
 
     def _load_chunks(self, client_name, prefix):
-        index_path = os.path.join(self.index_dir, f"{client_name}_{prefix}.faiss")
-        docstore_path = os.path.join(self.index_dir, f"{client_name}_{prefix}_docstore.pkl")
-
-        if not os.path.exists(index_path):
-            print(f"⚠️ No FAISS index found for {prefix} of {client_name}.")
-            return []
-
-        if os.path.exists(docstore_path):
-            with open(docstore_path, "rb") as f:
-                docstore = pickle.load(f)
-            return list(docstore.values())
-        else:
-            print(f"⚠️ No document store found for {prefix} of {client_name}.")
+        _, docstore = self._get_cached_index(f"{client_name}_{prefix}")
+        if docstore is None:
+            print(f"⚠️ No FAISS index or document store found for {prefix} of {client_name}.")
             return []
+        return list(docstore.values())
 
     def _faiss_search(self, client_name, prefix, query_embedding, top_k):
-        index_path = os.path.join(self.index_dir, f"{client_name}_{prefix}.faiss")
-        docstore_path = os.path.join(self.index_dir, f"{client_name}_{prefix}_docstore.pkl")
-
-        if not os.path.exists(index_path):
+        index, docstore = self._get_cached_index(f"{client_name}_{prefix}")
+        if index is None:
             return []
 
-        index = faiss.read_index(index_path)
-        D, I = index.search(np.array([query_embedding]), top_k)
-
-        if not os.path.exists(docstore_path):
-            return []
-
-        with open(docstore_path, "rb") as f:
-            docstore = pickle.load(f)
-
+        D, I = index.search(np.array([query_embedding], dtype=np.float32), top_k)
         return [docstore.get(i) for i in I[0] if i != -1 and docstore.get(i)]
 
+    def index_version(self, client_name):
+        """Fingerprint of the client's index files on disk; changes whenever an indexing run rewrites any of them."""
+        paths = [os.path.join(self.index_dir, f"{client_name}_notion.json"), self._notion_vectors_path(client_name)]
+        for name in [client_name] + [f"{client_name}_{prefix}" for prefix in SOURCE_TYPES]:
+            paths.extend(self._index_paths(name))
+        stamps = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                stamps.append(f"{path}:{stat.st_mtime_ns}:{stat.st_size}")
+            except OSError:
+                stamps.append(f"{path}:-")
+        return hash_text("\n".join(stamps))[:16]
+
     def get_notion_chunks(self, client_name):
         return self._load_notion_json(client_name, "notion")
 
@@ -476,22 +1049,54 @@ class FAISSVectorStore:
     def get_internal_slack_chunks(self, client_name):
         return self._load_chunks(client_name, "slack")
 
-    def search_faiss(self, query, client_name, top_k=5):
+    def search_sources(self, client_name, query_embedding, top_k=5):
+        """Searches every source index of a client in parallel, so latency follows the slowest source rather than the sum."""
+        futures = {
+            prefix: self._search_executor.submit(self._faiss_search, client_name, prefix, query_embedding, top_k)
+            for prefix in SOURCE_TYPES
+        }
+        return {f"{prefix}_chunks": future.result() for prefix, future in futures.items()}
+
+    def rank_notion_projects(self, projects, query_embedding, named_projects=None, top_n=NOTION_TOP_PROJECTS):
+        """The projects named in named_projects followed by the top_n projects closest to the query embedding."""
+        if not isinstance(projects, NotionProjects) or len(projects) <= top_n:
+            return projects
+        if projects.vectors is None:
+            print("⚠️ No Notion project embeddings yet, sending every project (re-run index_client_data.py)")
+            return projects
+
+        positions = []
+        lowered = projects.table.lowered("Project Name")
+        for name in named_projects or []:
+            if not isinstance(name, str) or not name.strip():
+                continue
+            hits = np.flatnonzero(lowered == name.strip().lower())
+            if not len(hits):
+                best = projects.table.name_index().best_match(name)
+                hits = np.flatnonzero(lowered == best.lower()) if best else []
+            positions.extend(int(i) for i in hits)
+
+        distances = ((projects.vectors - np.asarray(query_embedding, dtype=np.float32)) ** 2).sum(axis=1)
+        positions.extend(int(i) for i in np.argsort(distances)[:top_n])
+        positions = list(dict.fromkeys(positions))
+        print(f"🎯 Selected {len(positions)} of {len(projects)} Notion projects for the prompt")
+        return [projects[i] for i in positions]
+
+    def search_faiss(self, query, client_name, top_k=5, named_projects=None):
         print(f"🔍 Searching FAISS for query: '{query}' in client: {client_name}...")
 
-        query_embedding = get_gemini_embedding(query)
+        # The Notion table does not depend on the query, so load it while the query is being embedded
+        notion_future = self._search_executor.submit(self.get_notion_chunks, client_name)
+        query_embedding = get_query_embedding(query)
 
-        notion_chunks = self.get_notion_chunks(client_name)
+        notion_chunks = notion_future.result()
         if isinstance(notion_chunks, list):  # Handle list response
             notion_chunks = {"notion_chunks": notion_chunks}
+        notion_chunks["notion_chunks"] = self.rank_notion_projects(notion_chunks["notion_chunks"], query_embedding, named_projects)
 
         return {
             **notion_chunks,  # Merge notion_chunks dictionary
-            "hubspot_chunks": self._faiss_search(client_name, "hubspot", query_embedding, top_k),
-            "raw_messages_chunks": self._faiss_search(client_name, "raw_messages", query_embedding, top_k),
-            "transcript_chunks": self._faiss_search(client_name, "transcript", query_embedding, top_k),
-            "faq_chunks": self._faiss_search(client_name, "faq", query_embedding, top_k),
-            "slack_chunks": self._faiss_search(client_name, "slack", query_embedding, top_k),
+            **self.search_sources(client_name, query_embedding, top_k),
         }
 
 
@@ -499,7 +1104,8 @@ class FAISSVectorStore:
 if __name__ == "__main__":
 
     faiss_store = FAISSVectorStore()
-    faiss_store.create_index(documents)
+    # Pass --full to drop everything and rebuild from scratch
+    faiss_store.create_index(documents, full_rebuild="--full" in sys.argv)
 
     # Search for relevant document parts
     # results = faiss_store.search_faiss("latest sales report","Barton Watches", top_k=5)
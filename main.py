@@ -4,7 +4,13 @@ import json
 import google.generativeai as genai
 from dotenv import load_dotenv
 from slack_sdk import WebClient
+from slack_sdk.web.async_client import AsyncWebClient
 from index_client_data import FAISSVectorStore
+from slack_dispatcher import EventDispatcher
+from event_dedup import SeenEvents, event_key
+from async_runtime import AsyncRuntime
+from answer_cache import AnswerCache, answer_key, context_fingerprint
+from query_rules import classify_filter_intent
 from utils import (
     get_thread_metadata,
     store_thread_metadata,
@@ -12,38 +18,60 @@ from utils import (
     clean_slack_formatting,
     get_channel_name,
     send_slack_response,
+    send_slack_response_async,
+    SlackMessageUpdater,
     send_clarification_buttons,
-    send_slack_response_feedback,
+    send_slack_response_feedback_async,
     get_thread_messages,
     send_specific_project_confirmation_button,
+    project_name_cache,
 )
 
 from gemini_utils import (
     classify_multiple_projects_query_intent,
     get_multiple_projects_from_thread_context,
     generate_gemini_response,
-    generate_custom_filter_response
+    generate_custom_filter_response,
+    get_intent_stats
 )
 
 import asyncio
+import atexit
 import threading
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
 GOOGLE_CREDENTIALS = os.getenv("GOOGLE_CREDENTIALS_JSON")
 SLACK_BOT_USER_ID = os.getenv("SLACK_BOT_USER_ID")
+# Stream answers into the "I'm on it" message as Gemini writes them instead of posting them when complete
+SLACK_STREAM_RESPONSES = os.getenv("SLACK_STREAM_RESPONSES", "true").lower() in ("1", "true", "yes")
 
 # Initialize services
 faiss_store = FAISSVectorStore()  # Initialize FAISS vector store for data indexing and retrieval
 app = Flask(__name__)  # Initialize Flask application
 genai.configure(api_key=GEMINI_API_KEY)  # Configure Generative AI with API key
 slack_client = WebClient(token=SLACK_BOT_TOKEN)  # Initialize Slack WebClient with bot token
+async_slack_client = AsyncWebClient(token=SLACK_BOT_TOKEN)  # Slack client for queries running on the event loop
+runtime = AsyncRuntime()  # The one event loop every query runs on
+dispatcher = EventDispatcher()  # Bounded queue + fixed worker pool for everything Slack asks us to do
+# atexit runs in reverse: drain the dispatcher (which may still hand queries to the loop) before the loop
+atexit.register(runtime.shutdown)
+atexit.register(dispatcher.shutdown)
+seen_events = SeenEvents()  # Event ids already accepted, so Slack's re-deliveries don't run the pipeline again
+answer_cache = AnswerCache()  # Final answers to first questions, reused while the question and its context match
 
 # List of assistants derived from FAISS index files
 ASSISTANTS = [f.replace(".faiss", "") for f in os.listdir("faiss_index") if f.endswith(".faiss")]
 
+# Read every assistant's project sheet in the background so "Specific Project" clicks never wait on Google
+threading.Thread(target=project_name_cache.warm_all, daemon=True).start()
 
-def generate_final_response(user_query, is_follow_up, thread_context, thread_messages, notion_chunks=None, hubspot_chunks=None, raw_messages_chunks=None, transcript_chunks=None, faq_chunks=None, internal_slack_messages_chunks=None, query_type=None, user_slack_id=None, project_name=None, multiple_projects_array=None):
+# Map all indexes up front so every worker shares them through the page cache
+if faiss_store.mmap:
+    faiss_store.map_all_indexes()
+
+
+async def generate_final_response(user_query, is_follow_up, thread_context, thread_messages, notion_chunks=None, hubspot_chunks=None, raw_messages_chunks=None, transcript_chunks=None, faq_chunks=None, internal_slack_messages_chunks=None, query_type=None, user_slack_id=None, project_name=None, multiple_projects_array=None, is_filter_query=None, on_partial=None):
     """
     Generates the final response based on the user query, context, and data chunks.
 
@@ -57,6 +85,8 @@ def generate_final_response(user_query, is_follow_up, thread_context, thread_mes
         user_slack_id (str, optional): Slack user ID.
         project_name (str, optional): Specific project name.
         multiple_projects_array (list, optional): List of multiple project names.
+        is_filter_query (bool, optional): Intent already classified by the caller; classified here when None.
+        on_partial (coroutine function, optional): Receives the partial answer while Gemini streams it.
 
     Returns:
         str: Final response or error message.
@@ -66,9 +96,11 @@ def generate_final_response(user_query, is_follow_up, thread_context, thread_mes
         print("is_follow_up", is_follow_up)
         if query_type == "multiple_projects":
             #  classify query intent
-            if classify_multiple_projects_query_intent(user_query):
+            if is_filter_query is None:
+                is_filter_query = await classify_multiple_projects_query_intent(user_query)
+            if is_filter_query:
                 print("🔎 Classified as filtering query")
-                result = generate_custom_filter_response(user_query, notion_chunks)
+                result = await generate_custom_filter_response(user_query, notion_chunks)
             else:
                 print("💬 Classified as non-filtering query")
                 user_query_with_project_context = user_query
@@ -77,16 +109,17 @@ def generate_final_response(user_query, is_follow_up, thread_context, thread_mes
 - Use projects in {multiple_projects_array} to answer the user query, unless a project name is explicitly entered."""
                 
                 print(user_query_with_project_context,"user_query_with_project_context")
-                result = generate_gemini_response(
+                result = await generate_gemini_response(
                         query_type, user_query_with_project_context, thread_messages, notion_chunks, hubspot_chunks,
                         raw_messages_chunks, transcript_chunks, faq_chunks,
-                        internal_slack_messages_chunks, project_name, multiple_projects_array
+                        internal_slack_messages_chunks, project_name, multiple_projects_array, on_partial=on_partial
                     )
         else:
             processed_query = user_query
-            result = generate_gemini_response(
+            result = await generate_gemini_response(
                 query_type, processed_query, thread_messages, notion_chunks, hubspot_chunks, raw_messages_chunks,
-                transcript_chunks, faq_chunks, internal_slack_messages_chunks, project_name, multiple_projects_array
+                transcript_chunks, faq_chunks, internal_slack_messages_chunks, project_name, multiple_projects_array,
+                on_partial=on_partial
             )
         return result
     except Exception as e:
@@ -96,7 +129,7 @@ def generate_final_response(user_query, is_follow_up, thread_context, thread_mes
 
 def initiate_gpt_query(user_query, assistant_name, channel, thread_ts, thread_context, query_type=None, user_slack_id=None,project_name=None):
     """
-    Initiates a GPT query asynchronously.
+    Schedules a GPT query on the shared event loop and returns immediately.
 
     Args:
         user_query (str): User's query.
@@ -111,27 +144,38 @@ def initiate_gpt_query(user_query, assistant_name, channel, thread_ts, thread_co
     if not assistant_name:
         send_slack_response(slack_client, channel, ":slam: I do not have data for this client in my knowledge base.", thread_ts,None,[])
         return
-    typing_message = send_slack_response(slack_client, channel, f"Ok, I'm on it!  :typingcatr:", thread_ts,None,[])
-    typing_ts = typing_message.get("ts") if typing_message else None
+
     async def async_wrapper():
-        await process_faiss_and_generate_responses(user_query, thread_context, assistant_name, channel, thread_ts, query_type, user_slack_id, project_name)
-        if typing_ts:
+        typing_message = await send_slack_response_async(async_slack_client, channel, f"Ok, I'm on it!  :typingcatr:", thread_ts,None,[])
+        typing_ts = typing_message.get("ts") if typing_message else None
+        # The typing message becomes the answer, edited as it streams in
+        updater = SlackMessageUpdater(async_slack_client, channel, typing_ts) if typing_ts and SLACK_STREAM_RESPONSES else None
+        answered_in_place = await process_faiss_and_generate_responses(user_query, thread_context, assistant_name, channel, thread_ts, query_type, user_slack_id, project_name, updater)
+        if typing_ts and not answered_in_place:
             try:
-                slack_client.chat_delete(channel=channel, ts=typing_ts)
+                await async_slack_client.chat_delete(channel=channel, ts=typing_ts)
             except Exception as e:
                 print("❗️ Failed to delete typing message:", e)
 
-    def run_async():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            loop.run_until_complete(async_wrapper())
-        finally:
-            loop.close()
+    runtime.submit(async_wrapper())
+
+def discard_task(task):
+    """
+    Cancels a task whose result is no longer needed and consumes its outcome.
+
+    Cancelling cannot stop a search already running in asyncio.to_thread, so the task may still finish with an
+    exception; retrieving it here keeps asyncio from logging "Task exception was never retrieved".
+
+    Args:
+        task (asyncio.Task or None): Task to discard; None is ignored.
+    """
+    if task is None:
+        return
+    task.cancel()
+    task.add_done_callback(lambda done: done.cancelled() or done.exception())
 
-    threading.Thread(target=run_async).start()
 
-async def process_faiss_and_generate_responses(user_query, thread_context, assistant_name, channel, thread_ts, query_type, user_slack_id, project_name):
+async def process_faiss_and_generate_responses(user_query, thread_context, assistant_name, channel, thread_ts, query_type, user_slack_id, project_name, updater=None):
     """
     Processes FAISS search and generates responses asynchronously.
 
@@ -144,6 +188,10 @@ async def process_faiss_and_generate_responses(user_query, thread_context, assis
         query_type (str): Type of the query.
         user_slack_id (str): Slack user ID.
         project_name (str): Specific project name.
+        updater (SlackMessageUpdater, optional): Message to stream the answer into instead of posting a new one.
+
+    Returns:
+        bool: True if the answer was written into the updater's message.
     """
     try:
         is_follow_up = False
@@ -161,13 +209,35 @@ async def process_faiss_and_generate_responses(user_query, thread_context, assis
                 assistant_counter += 1
                 thread_context_lines.append(f'Assistant Reply {assistant_counter}: "{msg["text"]}"\n')
         thread_messages = " ".join(thread_context_lines)
+        is_filter_query = None
         if query_type == "multiple_projects":
-            if(is_follow_up):
-                multiple_projects_array = get_multiple_projects_from_thread_context(thread_context)
-                if isinstance(multiple_projects_array, list) and all(isinstance(i, str) for i in multiple_projects_array):
-                    combined_string = " ".join(multiple_projects_array)
-        query_to_search = f"{project_name} {user_query}" if project_name else f"{combined_string} {user_query}" 
-        faiss_result = await async_faiss_search(query_to_search, assistant_name,channel,thread_ts)
+            retrieval_task = None
+            if classify_filter_intent(user_query) is None:
+                # Only a Gemini classification is slow enough to be worth overlapping with the extraction -> search
+                # chain; when the local rules decide, filter queries never start a retrieval they would throw away
+                retrieval_task = asyncio.create_task(
+                    retrieve_multiple_projects_context(user_query, thread_context, is_follow_up, assistant_name, channel, thread_ts)
+                )
+            try:
+                is_filter_query = await classify_multiple_projects_query_intent(user_query)
+            except Exception:
+                discard_task(retrieval_task)
+                raise
+            if is_filter_query:
+                # A filter only reads the Notion table, so the chunks the chain would fetch are not needed
+                discard_task(retrieval_task)
+                faiss_result = await asyncio.to_thread(faiss_store.get_notion_chunks, assistant_name)
+                if isinstance(faiss_result, list):
+                    faiss_result = {"notion_chunks": faiss_result}
+            elif retrieval_task:
+                multiple_projects_array, faiss_result = await retrieval_task
+            else:
+                multiple_projects_array, faiss_result = await retrieve_multiple_projects_context(
+                    user_query, thread_context, is_follow_up, assistant_name, channel, thread_ts
+                )
+        else:
+            query_to_search = f"{project_name} {user_query}" if project_name else f"{combined_string} {user_query}" 
+            faiss_result = await async_faiss_search(query_to_search, assistant_name,channel,thread_ts, [project_name] if project_name else None)
         notion_chunks = faiss_result.get("notion_chunks", ["No relevant data found."])
         hubspot_chunks = faiss_result.get("hubspot_chunks", ["No relevant data found."])
         raw_messages_chunks = faiss_result.get("raw_messages_chunks", ["No relevant data found."])
@@ -176,22 +246,70 @@ async def process_faiss_and_generate_responses(user_query, thread_context, assis
         internal_slack_messages_chunks = faiss_result.get("internal_slack_messages_chunks", ["No relevant data found."])
         # print("notion_chunks",len(notion_chunks),"hubspot_chunks",len(hubspot_chunks),"raw_messages_chunks",len(raw_messages_chunks),"transcript_chunks",len(transcript_chunks),"faq_chunks",len(faq_chunks),"internal_slack_messages_chunks",len(internal_slack_messages_chunks))
         
-        gemini_response = await asyncio.to_thread(generate_final_response, user_query, is_follow_up, thread_context, thread_messages, notion_chunks,hubspot_chunks,raw_messages_chunks, transcript_chunks,faq_chunks, internal_slack_messages_chunks, query_type, user_slack_id, project_name, multiple_projects_array)
-        send_slack_response(slack_client,channel, gemini_response, thread_ts, {
+        # Follow-up answers depend on the thread, so only first questions are shared across threads. Filter answers
+        # are cheap to recompute and depend on today's date ("last week"), so they are never cached either
+        cache_key = None
+        if not is_follow_up and not is_filter_query:
+            index_version = await asyncio.to_thread(faiss_store.index_version, assistant_name)
+            cache_key = answer_key(assistant_name, user_query, query_type, project_name, context_fingerprint({
+                "notion": notion_chunks, "hubspot": hubspot_chunks, "raw_messages": raw_messages_chunks,
+                "transcript": transcript_chunks, "faq": faq_chunks, "internal_slack": internal_slack_messages_chunks,
+            }), index_version)
+            # Lets Regenerate evict this answer, since the regenerated one is a follow-up and is never cached
+            store_thread_metadata(thread_ts, {"answer_cache_key": cache_key})
+        gemini_response = None
+        if cache_key:
+            gemini_response = answer_cache.get(cache_key, assistant_name, index_version)
+            if gemini_response:
+                print(f"📦 Answer cache hit {answer_cache.stats()}")
+        if gemini_response is None:
+            gemini_response = await generate_final_response(user_query, is_follow_up, thread_context, thread_messages, notion_chunks,hubspot_chunks,raw_messages_chunks, transcript_chunks,faq_chunks, internal_slack_messages_chunks, query_type, user_slack_id, project_name, multiple_projects_array, is_filter_query, updater.update if updater else None)
+            if cache_key:
+                answer_cache.put(cache_key, assistant_name, index_version, gemini_response)
+        metadata = {
                     "event_type": "tracking_point",
                     "event_payload": {
                         "status": "acknowledged",
                         "user_id": "U123456",
                         "step": "validation_passed"
                     }
-                },[])
+                }
+        answered_in_place = updater is not None and await updater.finish(gemini_response, metadata) is not None
+        if not answered_in_place:
+            await send_slack_response_async(async_slack_client,channel, gemini_response, thread_ts, metadata,[])
         
-        send_slack_response_feedback(slack_client, channel, thread_ts)
+        await send_slack_response_feedback_async(async_slack_client, channel, thread_ts)
+        return answered_in_place
     except Exception as e:
         print(f"❌ Error in process_faiss_and_generate_responses: {str(e)}")
-        send_slack_response(slack_client, channel, "An error occurred while processing your request.", thread_ts, None, [])
+        await send_slack_response_async(async_slack_client, channel, "An error occurred while processing your request.", thread_ts, None, [])
+        return False
+
+async def retrieve_multiple_projects_context(user_query, thread_context, is_follow_up, assistant_name, channel, thread_ts):
+    """
+    Extracts the projects discussed so far (follow-ups only) and searches FAISS with them prepended to the query.
+
+    Args:
+        user_query (str): User's query.
+        thread_context (list): Conversation thread context.
+        is_follow_up (bool): Indicates if the query is a follow-up.
+        assistant_name (str): Name of the assistant.
+        channel (str): Slack channel ID.
+        thread_ts (str): Thread timestamp.
 
-async def async_faiss_search(full_prompt, assistant_name,channel,thread_ts):
+    Returns:
+        tuple: (multiple_projects_array or None, FAISS search results).
+    """
+    multiple_projects_array = None
+    combined_string = ""
+    if is_follow_up:
+        multiple_projects_array = await get_multiple_projects_from_thread_context(thread_context)
+        if isinstance(multiple_projects_array, list) and all(isinstance(i, str) for i in multiple_projects_array):
+            combined_string = " ".join(multiple_projects_array)
+    faiss_result = await async_faiss_search(f"{combined_string} {user_query}", assistant_name, channel, thread_ts, multiple_projects_array)
+    return multiple_projects_array, faiss_result
+
+async def async_faiss_search(full_prompt, assistant_name,channel,thread_ts, named_projects=None):
     """
     Performs an asynchronous FAISS search.
 
@@ -200,15 +318,17 @@ async def async_faiss_search(full_prompt, assistant_name,channel,thread_ts):
         assistant_name (str): Name of the assistant.
         channel (str): Slack channel ID.
         thread_ts (str): Thread timestamp.
+        named_projects (list, optional): Project names always included in the Notion projects returned.
 
     Returns:
         dict: FAISS search results.
     """
     try:
-        return await asyncio.to_thread(faiss_store.search_faiss, full_prompt, assistant_name)
+        # The search is NumPy/FAISS work that releases the GIL, so it runs on the loop's thread pool
+        return await asyncio.to_thread(faiss_store.search_faiss, full_prompt, assistant_name, 5, named_projects)
     except Exception as e:
         print(f"❌ FAISS Error: {e}")
-        send_slack_response(slack_client,channel,"Hey <@U08B0GKSTGF>, I’m broken 🫠 Got a query indexing error... fix me fast, I have work to do :typingcat:", thread_ts, None, [])
+        await send_slack_response_async(async_slack_client,channel,"Hey <@U08B0GKSTGF>, I’m broken 🫠 Got a query indexing error... fix me fast, I have work to do :typingcat:", thread_ts, None, [])
         return {"notion_chunks": [], "hubspot_chunks": [], "raw_messages_chunks": [], "transcript_chunks": [], "faq_chunks": [], "internal_slack_messages_chunks": []}
 
 @app.route("/slack/events", methods=["POST"])
@@ -226,20 +346,37 @@ def slack_events():
             event = data["event"]
             event_type = event.get("type")
 
-            # Handle app mentions
+            # Handle app mentions; everything past parsing happens on a worker so Slack gets its 200 right away
             if event_type == "app_mention":
-                channel = event["channel"]
-                thread_ts = event.get("thread_ts", event.get("ts"))
-                user_slack_id =  event["user"]
-                user_query = clean_slack_formatting(event["text"].replace(f"<@{SLACK_BOT_USER_ID}>", "").strip())
-                thread_context = get_thread_messages(slack_client, channel, thread_ts)
-                threading.Thread(target=handle_slack_actions, args=(user_query, channel, thread_ts, thread_context, user_slack_id)).start()
+                key = event_key(data)
+                if key and not seen_events.first_time(key, request.headers.get("X-Slack-Retry-Num")):
+                    print(f"⏭️ Dropping duplicate Slack event {key} (retry {request.headers.get('X-Slack-Retry-Num')})")
+                    return make_response(jsonify({"status": "duplicate"}), 200)
+                if not dispatcher.submit(handle_app_mention, event):
+                    if key:
+                        seen_events.forget(key)
+                    # Slack re-delivers non-2xx events, so a full queue just delays this one
+                    return make_response(jsonify({"status": "busy"}), 503)
 
         return make_response(jsonify({"status": "ok"}), 200)
     except Exception as e:
         print(f"❌ Error in slack_events: {str(e)}")
         return make_response(jsonify({"status": "error", "message": str(e)}), 500)
 
+def handle_app_mention(event):
+    """
+    Handles an app mention on a dispatcher worker.
+
+    Args:
+        event (dict): The Slack app_mention event.
+    """
+    channel = event["channel"]
+    thread_ts = event.get("thread_ts", event.get("ts"))
+    user_slack_id =  event["user"]
+    user_query = clean_slack_formatting(event["text"].replace(f"<@{SLACK_BOT_USER_ID}>", "").strip())
+    thread_context = get_thread_messages(slack_client, channel, thread_ts)
+    handle_slack_actions(user_query, channel, thread_ts, thread_context, user_slack_id)
+
 @app.route("/slack/interactive", methods=["POST"])
 def slack_interactive():
     """
@@ -250,6 +387,26 @@ def slack_interactive():
     """
     try:
         data = json.loads(request.form["payload"])
+        if not dispatcher.submit(handle_interactive_action, data):
+            return make_response(jsonify({"status": "busy"}), 503)
+        return make_response(b"", 200)
+    except Exception as e:
+        print(f"❌ Error handling Slack interactive request: {str(e)}")
+        return make_response(jsonify({"status": "Error", "message": str(e)}), 500)
+
+@app.route("/slack/metrics", methods=["GET"])
+def slack_metrics():
+    """Queue depth and worker counters of the Slack dispatcher, dropped duplicate events, event loop load, intent fallbacks and answer cache hits."""
+    return jsonify({**dispatcher.stats(), **seen_events.stats(), **runtime.stats(), **get_intent_stats(), **answer_cache.stats()})
+
+def handle_interactive_action(data):
+    """
+    Handles a Slack button click on a dispatcher worker.
+
+    Args:
+        data (dict): The interactive payload sent by Slack.
+    """
+    try:
         channel_id = data["channel"]["id"]
         thread_ts = data.get("message", {}).get("ts") or data["original_message"].get("thread_ts")
         action_value = data["actions"][0]["value"]
@@ -264,10 +421,9 @@ def slack_interactive():
         if action_value == "yes":
             store_thread_metadata(thread_ts, {"clarification_requested": "specific_project"})
             if metadata and "project_name" in metadata:
-                import threading
                 project_name = metadata["project_name"]
-                threading.Thread(target=handle_slack_actions, args=(user_query, channel_id, thread_ts, thread_context, user_slack_id, metadata,message_ts,project_name)).start()
-       
+                handle_slack_actions(user_query, channel_id, thread_ts, thread_context, user_slack_id, metadata, message_ts, project_name)
+
             else:
                 send_slack_response(slack_client, channel_id, "Context is expired, could you please ask your query again", thread_ts, None, [])
 
@@ -281,8 +437,10 @@ def slack_interactive():
                 )
         
         elif action_value == "regenerate":
-            import threading
-            threading.Thread(target=handle_slack_actions, args=(user_query, channel_id, thread_ts, thread_context, user_slack_id, metadata, message_ts,":repeat: Regenerating response...")).start()
+            # The answer being regenerated was not good enough to serve to other threads either
+            if metadata.get("answer_cache_key"):
+                answer_cache.evict(metadata["answer_cache_key"])
+            handle_slack_actions(user_query, channel_id, thread_ts, thread_context, user_slack_id, metadata, message_ts, ":repeat: Regenerating response...")
         
         elif action_value == "specific_project":
             store_thread_metadata(thread_ts, {"clarification_requested": "specific_project"})
@@ -296,17 +454,15 @@ def slack_interactive():
         
         elif action_value == "multiple_projects":
             store_thread_metadata(thread_ts, {"clarification_requested": "multiple_projects"})
-            initiate_gpt_query(user_query, assistant_name, channel_id, thread_ts, thread_context, "multiple_projects", user_slack_id, None)
             slack_client.chat_update(
                 channel=channel_id,
                 ts=message_ts,
                 text="*Multiple Projects*",
                 attachments=[]
             )
-        return make_response(b"", 200)
+            initiate_gpt_query(user_query, assistant_name, channel_id, thread_ts, thread_context, "multiple_projects", user_slack_id, None)
     except Exception as e:
         print(f"❌ Error handling Slack interactive request: {str(e)}")
-        return make_response(jsonify({"status": "Error", "message": str(e)}), 500)
 
 
 def handle_slack_actions(user_query, channel_id, thread_ts, thread_context,user_slack_id,metadata=None,message_ts=None,message_text=None):
@@ -355,7 +511,6 @@ def handle_slack_actions(user_query, channel_id, thread_ts, thread_context,user_
                 
         # Check if the user has requested clarification earlier or not
         if get_thread_metadata(thread_ts).get("clarification_requested")=="multiple_projects":
-            initiate_gpt_query(user_query, assistant_name, channel_id, thread_ts, thread_context,"multiple_projects",user_slack_id, None)
             if message_ts:
                 slack_client.chat_update(
                     channel=channel_id,
@@ -363,9 +518,9 @@ def handle_slack_actions(user_query, channel_id, thread_ts, thread_context,user_
                     text=f"*{message_text}*",
                     attachments=[]
                 )
+            initiate_gpt_query(user_query, assistant_name, channel_id, thread_ts, thread_context,"multiple_projects",user_slack_id, None)
             return
         elif get_thread_metadata(thread_ts).get("clarification_requested")=="specific_project":
-            initiate_gpt_query(user_query, assistant_name, channel_id, thread_ts, thread_context,"specific_project",user_slack_id, get_thread_metadata(thread_ts).get("project_name"))
             if message_ts:
                 slack_client.chat_update(
                     channel=channel_id,
@@ -373,6 +528,7 @@ def handle_slack_actions(user_query, channel_id, thread_ts, thread_context,user_
                     text=f"*{message_text}*",
                     attachments=[]
                 )
+            initiate_gpt_query(user_query, assistant_name, channel_id, thread_ts, thread_context,"specific_project",user_slack_id, get_thread_metadata(thread_ts).get("project_name"))
             return
 
         # If no clarification is requested, proceed with the query
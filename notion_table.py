@@ -0,0 +1,108 @@
+from datetime import datetime
+import numpy as np
+from project_name_index import ProjectNameIndex
+
+DATE_FIELDS = ["Created Time", "Original Due Date", "Deployment Date"]
+NUMBER_FIELDS = ["Total Project Hours", "Projected Dev Hours", "Projected QI Hours"]
+TEXT_FIELDS = ["Project Name", "Details", "Comments", "Status"]
+
+
+def parse_iso_days(value):
+    """Days since 0001-01-01 (fractional for times), or NaN when the value is empty or not ISO formatted."""
+    if not value:
+        return np.nan
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return np.nan
+    return parsed.toordinal() + (parsed.hour * 3600 + parsed.minute * 60 + parsed.second) / 86400
+
+
+class NotionProjectTable:
+    """Column-oriented view of a client's Notion projects, parsed once so filters run as NumPy masks.
+
+    Dates are stored as ordinal days, hours as float arrays (NaN when missing) and Status as categorical codes.
+    Columns for other properties are built on first use and kept.
+    """
+
+    def __init__(self, projects):
+        self.size = len(projects)
+        self._projects = projects
+        self._raw = {}
+        self._dates = {}
+        self._numbers = {}
+        self._lowered = {}
+        self._categories = {}
+        self._name_indexes = {}
+        for field in DATE_FIELDS:
+            self.dates(field)
+        for field in NUMBER_FIELDS:
+            self.numbers(field)
+        for field in TEXT_FIELDS:
+            self.lowered(field)
+        self.categories("Status")
+
+    def raw(self, prop):
+        if prop not in self._raw:
+            column = np.empty(self.size, dtype=object)
+            column[:] = [project.get(prop) for project in self._projects]
+            self._raw[prop] = column
+        return self._raw[prop]
+
+    def dates(self, prop):
+        if prop not in self._dates:
+            self._dates[prop] = np.array([parse_iso_days(value) for value in self.raw(prop)], dtype=np.float64)
+        return self._dates[prop]
+
+    def numbers(self, prop):
+        if prop not in self._numbers:
+            values = []
+            for value in self.raw(prop):
+                try:
+                    values.append(float(value) if value else np.nan)
+                except (TypeError, ValueError):
+                    values.append(np.nan)
+            self._numbers[prop] = np.array(values, dtype=np.float64)
+        return self._numbers[prop]
+
+    def lowered(self, prop):
+        if prop not in self._lowered:
+            self._lowered[prop] = np.array([str(value or "").lower() for value in self.raw(prop)], dtype=str)
+        return self._lowered[prop]
+
+    def categories(self, prop):
+        """Returns (distinct values, code per project) for a low-cardinality property such as Status."""
+        if prop not in self._categories:
+            values = list(self.raw(prop))
+            distinct = list(dict.fromkeys(values))
+            lookup = {value: code for code, value in enumerate(distinct)}
+            codes = np.array([lookup[value] for value in values], dtype=np.int32)
+            self._categories[prop] = (distinct, codes)
+        return self._categories[prop]
+
+    def name_index(self, prop="Project Name"):
+        """Token/trigram index over a name column, for project_match filters."""
+        if prop not in self._name_indexes:
+            self._name_indexes[prop] = ProjectNameIndex(self.raw(prop))
+        return self._name_indexes[prop]
+
+    def select(self, mask):
+        """Returns the project dicts where mask is True, in their original order."""
+        return [self._projects[i] for i in np.flatnonzero(mask)]
+
+
+def project_record_text(project):
+    """One project as "Field: value" lines, the text its retrieval embedding is computed from."""
+    return "\n".join(f"{field}: {value}" for field, value in project.items() if value not in (None, "", []))
+
+
+class NotionProjects(list):
+    """The list of project dicts loaded from {client}_notion.json, carrying its pre-parsed NotionProjectTable.
+
+    vectors holds one embedding row per project (from {client}_notion_vectors.npy) or None if it was never built.
+    """
+
+    def __init__(self, projects, vectors=None):
+        super().__init__(projects)
+        self.table = NotionProjectTable(self)
+        self.vectors = vectors
@@ -0,0 +1,126 @@
+import re
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from difflib import SequenceMatcher
+
+# Words that say nothing about which project is meant, shared by every project-name matcher
+PROJECT_NAME_STOP_WORDS = {
+    "when", "did", "we", "deploy", "deployed", "the", "to", "of", "on", "in", "for",
+    "hi", "hello", "hey", "there", "how", "are", "you", "what", "is", "this",
+    "project", "about", "can", "tell", "me", "more"
+}
+
+# How many n-gram candidates get a full SequenceMatcher comparison before the fuzzy fallback widens its search
+FUZZY_CANDIDATES = 50
+
+
+def tokenize(text):
+    """Lowercased word tokens of text without stop words, in order of first appearance."""
+    words = re.findall(r'\w+', text.lower())
+    return list(dict.fromkeys(word for word in words if word not in PROJECT_NAME_STOP_WORDS))
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def fuzzy_ratio(query, candidate, cutoff):
+    """difflib.get_close_matches' similarity score, or 0.0 as soon as a cheap upper bound falls below cutoff."""
+    matcher = SequenceMatcher(None, candidate, query)
+    if matcher.real_quick_ratio() < cutoff or matcher.quick_ratio() < cutoff:
+        return 0.0
+    return matcher.ratio()
+
+
+class ProjectNameIndex:
+    """Token postings plus a character trigram index over project names, built once per name list.
+
+    Exact token overlap is answered from the postings, and a fuzzy hit usually comes from the few names sharing the
+    most trigrams with the query. A fuzzy miss is still linear: it checks every name whose length could reach the
+    cutoff, though most of them are rejected by difflib's cheap upper bounds without a full comparison.
+    """
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.normalized = []
+        self._postings = {}
+        self._trigrams = {}
+        for position, name in enumerate(self.names):
+            tokens = tokenize(name) if isinstance(name, str) else []
+            normalized = "".join(tokens)
+            self.normalized.append(normalized)
+            for token in tokens:
+                self._postings.setdefault(token, []).append(position)
+            if normalized:
+                for gram in trigrams(normalized):
+                    self._trigrams.setdefault(gram, []).append(position)
+        # Positions sorted by normalized length, for the length bound in fuzzy_matches
+        self._by_length = sorted(range(len(self.names)), key=lambda position: len(self.normalized[position]))
+        self._lengths = [len(self.normalized[position]) for position in self._by_length]
+
+    def token_overlaps(self, query):
+        """Counter of name position -> number of query tokens the name shares."""
+        overlaps = Counter()
+        for token in tokenize(query):
+            overlaps.update(self._postings.get(token, ()))
+        return overlaps
+
+    def _score(self, normalized_query, positions, cutoff):
+        # fuzzy_ratio with one matcher: difflib indexes the query (seq2) once instead of once per name
+        matcher = SequenceMatcher()
+        matcher.set_seq2(normalized_query)
+        scored = []
+        for position in positions:
+            matcher.set_seq1(self.normalized[position])
+            if matcher.real_quick_ratio() < cutoff or matcher.quick_ratio() < cutoff:
+                continue
+            score = matcher.ratio()
+            if score >= cutoff:
+                scored.append((score, position))
+        return scored
+
+    def fuzzy_matches(self, query, cutoff, limit=FUZZY_CANDIDATES):
+        """[(score, position)] for names whose normalized form is at least cutoff similar to the query's, best first.
+
+        With a limit, the names sharing the most trigrams with the query are scored first. If none of them clears
+        cutoff, every other name of a length that can reach cutoff is scored too, so a match is never lost to the
+        limit; a query without a match therefore costs O(names of compatible length).
+        """
+        normalized_query = "".join(tokenize(query))
+        if not normalized_query:
+            # difflib rates two empty strings 1.0, so a stop-word-only query matches stop-word-only names
+            return [(1.0, position) for position, normalized in enumerate(self.normalized)
+                    if not normalized and isinstance(self.names[position], str) and self.names[position]]
+        shared = Counter()
+        for gram in trigrams(normalized_query):
+            shared.update(self._trigrams.get(gram, ()))
+        candidates = [position for position, _ in shared.most_common(limit)]
+        scored = self._score(normalized_query, candidates, cutoff)
+        if not scored and limit is not None:
+            # ratio <= 2 * min(la, lb) / (la + lb), so only lengths in [la * c / (2 - c), la * (2 - c) / c] can match
+            length = len(normalized_query)
+            low = bisect_left(self._lengths, length * cutoff / (2 - cutoff) - 1e-9)
+            high = bisect_right(self._lengths, length * (2 - cutoff) / cutoff + 1e-9) if cutoff else len(self._lengths)
+            tried = set(candidates)
+            scored = self._score(normalized_query, (p for p in self._by_length[low:high] if p not in tried), cutoff)
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return scored
+
+    def best_match(self, query, cutoff=0.5):
+        """The single most relevant project name for query, or None."""
+        overlaps = self.token_overlaps(query)
+        if overlaps:
+            best = max(overlaps.items(), key=lambda item: (item[1], -item[0]))
+            return self.names[best[0]]
+        matches = self.fuzzy_matches(query, cutoff)
+        if matches:
+            # Several names can normalize to the same string; the first of them wins
+            return self.names[self.normalized.index(self.normalized[matches[0][1]])]
+        return None
+
+    def matching_positions(self, query, cutoff=0.8):
+        """Positions of every name that shares a token with query or is at least cutoff similar to it."""
+        positions = set(self.token_overlaps(query))
+        positions.update(position for _, position in self.fuzzy_matches(query, cutoff, limit=None))
+        return positions
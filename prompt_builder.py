@@ -0,0 +1,129 @@
+import os
+import re
+from dotenv import load_dotenv
+from token_estimate import CHARS_PER_TOKEN, estimate_tokens
+from project_name_index import tokenize
+load_dotenv()
+
+# Tokens the context sections of a generate_gemini_response prompt may use, excluding the system instruction
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "24000"))
+# Share of the budget the conversation so far may take before its oldest messages are dropped
+THREAD_BUDGET_SHARE = float(os.getenv("THREAD_BUDGET_SHARE", "0.25"))
+# A chunk is cut to fit the remaining budget only if at least this many tokens of it would survive
+MIN_TRUNCATED_TOKENS = 64
+
+
+def _dedupe_key(text):
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def serialize_item(item):
+    """Compact text for one context item: a Notion project as "Field: value" pairs, anything else as its text."""
+    if isinstance(item, dict):
+        return "; ".join(f"{field}: {value}" for field, value in item.items() if value not in (None, "", []))
+    return re.sub(r"\n{3,}", "\n\n", str(item)).strip()
+
+
+def _overlap_score(text, query_terms):
+    """Share of the query's words that appear in text."""
+    if not query_terms:
+        return 0.0
+    return len(query_terms & set(tokenize(text))) / len(query_terms)
+
+
+def _fair_shares(demands, budget):
+    """Max-min fair split of budget: sections needing less than an equal share give the rest to the others."""
+    shares = {}
+    remaining = dict(demands)
+    while remaining:
+        equal = budget // len(remaining)
+        satisfied = {name: need for name, need in remaining.items() if need <= equal}
+        if not satisfied:
+            shares.update((name, equal) for name in remaining)
+            break
+        for name, need in satisfied.items():
+            shares[name] = need
+            budget -= need
+            del remaining[name]
+    return shares
+
+
+def _truncate(text, tokens):
+    return text[:tokens * CHARS_PER_TOKEN].rsplit(" ", 1)[0] + " …"
+
+
+class PromptAssembler:
+    """Fits the retrieved context of a prompt into a token budget.
+
+    Sections are lists of items in relevance order (as FAISS returns them). Items repeated across sections are kept
+    only in the first section they appear in, the thread keeps its most recent messages, and the remaining budget is
+    split fairly across sections before each one is filled best-first: items sharing more words with the query come
+    first, ties keep their retrieval order.
+    """
+
+    def __init__(self, budget=PROMPT_TOKEN_BUDGET, thread_share=THREAD_BUDGET_SHARE):
+        self.budget = budget
+        self.thread_share = thread_share
+
+    def fit_thread(self, thread_messages):
+        """The conversation so far, dropping the oldest messages past the thread's share of the budget."""
+        limit = int(self.budget * self.thread_share)
+        if estimate_tokens(thread_messages) <= limit:
+            return thread_messages
+        messages = re.split(r"(?=(?:User Query|Assistant Reply) \d+: )", thread_messages)
+        kept = []
+        used = 0
+        for message in reversed(messages):
+            used += estimate_tokens(message)
+            if used > limit:
+                break
+            kept.append(message)
+        if not kept:
+            return _truncate(messages[-1], limit)
+        return "".join(reversed(kept))
+
+    def fit_sections(self, sections, budget, query=""):
+        """{name: items} -> {name: serialized text}, deduplicated across sections, ranked against the query and
+        fairly truncated to budget."""
+        query_terms = set(tokenize(query or ""))
+        seen = set()
+        candidates = {}
+        for name, items in sections.items():
+            candidates[name] = []
+            for item in items or []:
+                text = serialize_item(item)
+                key = _dedupe_key(text)
+                if not key or key in seen:
+                    continue
+                seen.add(key)
+                candidates[name].append(text)
+            # sorted() is stable, so items scoring the same stay in retrieval order
+            candidates[name].sort(key=lambda text: -_overlap_score(text, query_terms))
+
+        demands = {name: sum(estimate_tokens(text) for text in texts) for name, texts in candidates.items()}
+        shares = _fair_shares(demands, max(budget, 0))
+        fitted = {}
+        for name, texts in candidates.items():
+            allowance = shares.get(name, 0)
+            lines = []
+            for text in texts:
+                tokens = estimate_tokens(text)
+                if tokens <= allowance:
+                    lines.append(text)
+                    allowance -= tokens
+                elif allowance >= MIN_TRUNCATED_TOKENS:
+                    lines.append(_truncate(text, allowance))
+                    allowance = 0
+                else:
+                    break
+            fitted[name] = "\n".join(f"- {line}" for line in lines)
+        return fitted
+
+    def assemble(self, thread_messages, sections, query=""):
+        """Returns (thread text, {name: section text}) and logs the tokens every part uses."""
+        thread = self.fit_thread(thread_messages or "")
+        fitted = self.fit_sections(sections, self.budget - estimate_tokens(thread), query)
+        usage = {"thread": estimate_tokens(thread), **{name: estimate_tokens(text) for name, text in fitted.items()}}
+        print("🧮 Prompt tokens: " + ", ".join(f"{name}={tokens}" for name, tokens in usage.items())
+              + f", total={sum(usage.values())}/{self.budget}")
+        return thread, fitted
@@ -0,0 +1,327 @@
+import re
+import sys
+import time
+import asyncio
+import calendar
+from datetime import date, datetime
+
+# Notion status values, as listed in generate_gemini_parsed_query's instructions
+STATUS_VALUES = [
+    "Project Setup", "Designer Review", "Lead Dev Review", "AM Review", "Ready To Start", "In Progress", "Pause",
+    "Code Review", "Quality Inspection", "Issues Found", "Dev Fixing Issues", "Need Support", "Ready For Client",
+    "Client Is Reviewing", "Prep for Deployment", "Deployment", "Ready to Deploy", "Done", "Archive",
+    "Design Revision", "Deployed", "Not Started", "Unknown"
+]
+MONTHS = [
+    "january", "february", "march", "april", "may", "june",
+    "july", "august", "september", "october", "november", "december"
+]
+
+# Longest first so "Ready To Start" wins over a shorter status inside it
+STATUS_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(status) for status in sorted(STATUS_VALUES, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE
+)
+# Statuses that are also everyday words ("what was done", "the deployment plan"); they only count in a status position
+COMMON_WORD_STATUSES = ["Done", "Deployment", "In Progress", "Pause", "Archive", "Deployed", "Unknown"]
+SPECIFIC_STATUS_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(status) for status in sorted(STATUS_VALUES, key=len, reverse=True)
+                     if status not in COMMON_WORD_STATUSES) + r")\b",
+    re.IGNORECASE
+)
+# "may" is a month only next to a date preposition or a day number
+MONTH_PATTERN = re.compile(
+    r"\b(" + "|".join(month for month in MONTHS + [month[:3] for month in MONTHS] if month != "may") + r")\b\.?"
+    r"|\b(in|during|since|before|after|until|of) may\b|\bmay \d{1,2}\b"
+)
+
+# Evidence that the query narrows the project list on Notion fields
+CONSTRAINT_CUES = [
+    # the relative dates preprocess_relative_dates turns into ranges
+    re.compile(r"\b(this|last|next|past|previous|coming)\s+(\d+\s+)?(days?|weeks?|months?|years?|yrs?|quarters?)\b"),
+    re.compile(r"\b(today|yesterday|tomorrow)\b"),
+    re.compile(r"\b\d{4}-\d{2}-\d{2}\b"),                             # ISO date
+    re.compile(r"\b(before|after|since|between|until|prior to)\b"),
+    re.compile(r"\b(more|less|greater|fewer|higher|lower) than\s+\d"),
+    re.compile(r"\b(over|under|above|below|at least|at most|exceeding)\s+\d"),
+    re.compile(r"\b\d+(\.\d+)?\s*(hours?|hrs?|h)\b"),
+    re.compile(r"\b(in|with|where|by|having)\b[^.?!]*\bstatus\b|\bstatus (is|=|:)"),
+    re.compile(r"\bfilter\w*\b"),
+    re.compile(r"\b(completed|finished|active|ongoing|paused|archived|pending)\s+projects\b"),
+    re.compile(r"\b(are|is|marked(?: as)?|status(?: is)?)\s+(done|deployment|in progress|paused?|archived?|deployed|unknown)\b"),
+    re.compile(r"\b(due|deadline)\b"),
+    re.compile(r"\b(created|started|initiated|deployed|launched|went live|completed)\s+(in|on|before|after|since|between|during|this|last)\b"),
+]
+# Evidence that the query asks for projects to be listed or counted; required before the rules answer "filter"
+LIST_CUES = re.compile(
+    r"^\s*(show|list|filter|find|count|give me (a list of |all )?projects)\b|\b(which|what) (projects?|ones)\b|\bhow many\b"
+    r"|\bprojects? (that|which|where|with)\b"
+)
+# Evidence that the query wants analysis or content from the data rather than a filtered list
+NON_FILTER_CUES = re.compile(
+    r"\b(summar\w*|blockers?|issues?|problems?|takeaways?|sentiment|meetings?|calls?|transcripts?|slack|messages?|"
+    r"emails?|feedback|respond\w*|why|explain|recommend\w*|risks?|updates?|insights?|lessons?|happen\w*|discuss\w*|"
+    r"overview|going on|concerns?|complain\w*)\b"
+)
+
+
+def classify_filter_intent(user_query):
+    """True/False when keyword rules are confident the query is (not) a Notion filter query, None when unsure."""
+    text = user_query.lower()
+    # Status names like "Issues Found" would otherwise look like a request to discuss issues
+    without_status = STATUS_PATTERN.sub(" ", text)
+    constraint = (bool(SPECIFIC_STATUS_PATTERN.search(text)) or bool(MONTH_PATTERN.search(text))
+                  or any(cue.search(text) for cue in CONSTRAINT_CUES))
+    non_filter = bool(NON_FILTER_CUES.search(without_status))
+    listing = bool(LIST_CUES.search(text))
+
+    if constraint and listing and not non_filter:
+        return True
+    if not constraint and not listing:
+        return False
+    # e.g. "what did the client say last week?" or "list the blockers on projects due this month": let the model decide
+    return None
+
+
+# Field synonyms from the mapping table in generate_gemini_parsed_query's prompt
+DATE_FIELD_CUES = {
+    "created_time": r"created|creation|started|start date|initiated",
+    "original_due_date": r"original due date|due date|due|deadline|target date",
+    "deployment_date": r"deployment date|deployed|deployment|deploy|go live|went live|launched|completed|live",
+}
+HOUR_FIELD_CUES = {
+    "dev_hours": r"projected dev|dev|development|engineering|build",
+    "qi_hours": r"projected qi|qi|qa|quality inspection|testing|test",
+    "total_hours": r"total project|total|overall|entire",
+}
+NUMBER = r"(\d+(?:\.\d+)?)"
+ISO_DATE = r"\d{4}-\d{2}-\d{2}"
+MONTH_NAME = r"(?:" + "|".join(MONTHS + [month[:4] for month in MONTHS] + [month[:3] for month in MONTHS]) + r")\.?"
+DAY_DATE = (
+    rf"(?:{ISO_DATE}|{MONTH_NAME}\s+\d{{1,2}}(?:st|nd|rd|th)?(?:,?\s+\d{{4}})?"
+    rf"|\d{{1,2}}(?:st|nd|rd|th)?\s+(?:of\s+)?{MONTH_NAME}(?:,?\s+\d{{4}})?)"
+)
+# Date expressions, most specific first; each is tried only on text no earlier expression consumed
+DATE_EXPRESSIONS = [
+    ("in", re.compile(rf"\bin:\s*\(?'?({ISO_DATE})'?,\s*'?({ISO_DATE})'?\)?")),  # from preprocess_relative_dates
+    ("between", re.compile(rf"\bbetween\s+({DAY_DATE})\s+and\s+({DAY_DATE})")),
+    ("before", re.compile(rf"\b(?:before|prior to)\s+({DAY_DATE})")),
+    ("after", re.compile(rf"\bafter\s+({DAY_DATE})")),
+    ("since", re.compile(rf"\bsince\s+({DAY_DATE})")),
+    ("equals", re.compile(rf"\bon\s+({DAY_DATE})")),
+    ("month", re.compile(rf"\b(?:in|during)\s+({MONTH_NAME})(?:\s+(\d{{4}}))?\b")),
+    ("year", re.compile(r"\b(?:in|during)\s+(\d{4})\b")),
+]
+NUMBER_EXPRESSIONS = [
+    ("between", re.compile(rf"\bbetween\s+{NUMBER}\s+and\s+{NUMBER}")),
+    ("greater_than", re.compile(rf"\b(?:more than|greater than|over|above|exceeding|higher than)\s+{NUMBER}")),
+    ("less_than", re.compile(rf"\b(?:less than|fewer than|under|below|lower than)\s+{NUMBER}")),
+]
+HOURS_WORD = re.compile(r"\b(hours?|hrs?|h)\b")
+# Words that carry no filter meaning; any other word left over means the parser did not understand the query
+FILLER_WORDS = {
+    "show", "me", "us", "all", "the", "projects", "project", "list", "of", "which", "what", "are", "is", "were", "was",
+    "with", "that", "in", "status", "give", "find", "filter", "have", "has", "had", "whose", "where", "and", "or", "any",
+    "there", "do", "we", "how", "many", "only", "a", "an", "for", "currently", "now", "please", "get", "can", "you",
+    "our", "work", "hours", "hour", "hrs", "h", "date", "time", "it", "their", "been", "being", "be", "those", "ones",
+    "marked", "as", "still", "at", "on", "did", "got", "need", "needs", "effort", "set", "to",
+}
+
+
+def _valid_iso(text):
+    """text if it is a real calendar date; date.fromisoformat raises ValueError for e.g. 2025-02-30."""
+    date.fromisoformat(text)
+    return text
+
+
+def _parse_day(text, current_year):
+    """ISO date for an ISO, 'March 1st', '1st of March' or 'March 1, 2025' style date."""
+    text = text.strip().rstrip(",")
+    if re.fullmatch(ISO_DATE, text):
+        return _valid_iso(text)
+    words = re.findall(r"[a-z]+|\d+", text)
+    month = next(i + 1 for i, name in enumerate(MONTHS) for word in words if name.startswith(word) and len(word) >= 3)
+    numbers = [int(word) for word in words if word.isdigit()]
+    day = numbers[0]
+    year = numbers[1] if len(numbers) > 1 else current_year
+    return datetime(year, month, day).strftime("%Y-%m-%d")
+
+
+def _month_range(month_text, year):
+    month = next(i + 1 for i, name in enumerate(MONTHS) if name.startswith(month_text.rstrip(".")))
+    last_day = calendar.monthrange(year, month)[1]
+    return [f"{year}-{month:02d}-01", f"{year}-{month:02d}-{last_day:02d}"]
+
+
+def _nearest_cue(text, cues, end):
+    """(field, span) of the field synonym ending closest before position end, or None."""
+    best = None
+    for field, pattern in cues.items():
+        for match in re.finditer(rf"\b({pattern})\b", text[:end]):
+            if best is None or match.end() > best[1][1]:
+                best = (field, match.span())
+    return best
+
+
+def parse_filter_query(normalized_query, current_year=None):
+    """Parses a common filter query into the dict generate_gemini_parsed_query would return, without a model call.
+
+    normalized_query is the output of preprocess_relative_dates. Returns None when any part of the query is not
+    understood, so the caller can fall back to Gemini.
+    """
+    current_year = current_year or datetime.now().year
+    text = normalized_query.lower().strip().rstrip("?.!")
+    parsed = {}
+    consumed = []
+
+    def free(span):
+        return all(span[1] <= start or span[0] >= end for start, end in consumed)
+
+    try:
+        for operator, pattern in DATE_EXPRESSIONS:
+            for match in pattern.finditer(text):
+                if not free(match.span()):
+                    continue
+                cue = _nearest_cue(text, DATE_FIELD_CUES, match.start())
+                if cue is None:
+                    return None  # a date without a field, e.g. "projects from last month"
+                field, cue_span = cue
+                if operator == "in":
+                    value = {"in": [_valid_iso(match.group(1)), _valid_iso(match.group(2))]}
+                elif operator == "between":
+                    value = {"between": [_parse_day(match.group(1), current_year), _parse_day(match.group(2), current_year)]}
+                elif operator == "month":
+                    value = {"in": _month_range(match.group(1), int(match.group(2) or current_year))}
+                elif operator == "year":
+                    value = {"in": [f"{match.group(1)}-01-01", f"{match.group(1)}-12-31"]}
+                else:
+                    value = {operator: _parse_day(match.group(1), current_year)}
+                parsed.setdefault(field, {}).update(value)
+                consumed += [match.span(), cue_span]
+
+        for operator, pattern in NUMBER_EXPRESSIONS:
+            for match in pattern.finditer(text):
+                if not free(match.span()):
+                    continue
+                window_start, window_end = max(0, match.start() - 40), min(len(text), match.end() + 40)
+                if not HOURS_WORD.search(text, window_start, window_end):
+                    return None  # a number that is not about hours
+                # The hours field named closest to the number, before or after it
+                field, cue_span = "total_hours", None
+                for candidate, cue_pattern in HOUR_FIELD_CUES.items():
+                    for cue in re.finditer(rf"\b({cue_pattern})\b", text[:window_end]):
+                        if cue.end() < window_start:
+                            continue
+                        distance = abs(cue.start() - match.start())
+                        if cue_span is None or distance < abs(cue_span[0] - match.start()):
+                            field, cue_span = candidate, cue.span()
+                values = [float(group) if "." in group else int(group) for group in match.groups()]
+                parsed.setdefault(field, {})[operator] = values if operator == "between" else values[0]
+                consumed.append(match.span())
+                if cue_span:
+                    consumed.append(cue_span)
+    except (StopIteration, ValueError, IndexError):
+        return None  # an impossible or half-recognized date
+
+    statuses = []
+    lookup = {status.lower(): status for status in STATUS_VALUES}
+    for match in STATUS_PATTERN.finditer(text):
+        if free(match.span()):
+            statuses.append(lookup[match.group(0).lower()])
+            consumed.append(match.span())
+    if statuses:
+        parsed["status"] = {"contains": list(dict.fromkeys(statuses))}
+
+    if not parsed:
+        return None
+    leftover = "".join(" " if not free((i, i + 1)) else char for i, char in enumerate(text))
+    if any(word not in FILLER_WORDS for word in re.findall(r"[a-z0-9']+", leftover)):
+        return None
+    return parsed
+
+
+# Hand-labeled multiple_projects queries: (query, is a filter query)
+LABELED_FILTER_QUERIES = [
+    ("Show only completed projects.", True),
+    ("List projects from last month.", True),
+    ("Projects where status is 'In Progress'.", True),
+    ("Show me all projects deployed after March 1st with more than 2 hours of dev work", True),
+    ("Show me all projects created in March", True),
+    ("List of all projects in Pause Status", True),
+    ("Which projects are in code review?", True),
+    ("projects with more than 10 total hours", True),
+    ("What was deployed last week?", True),
+    ("Show projects due this month", True),
+    ("List projects in Issues Found", True),
+    ("how many projects are done", True),
+    ("projects created between 2025-01-01 and 2025-02-01", True),
+    ("Which projects have less than 3 QI hours?", True),
+    ("Show me projects with status Ready For Client", True),
+    ("projects deployed in the past 30 days", True),
+    ("List all projects that are not started", True),
+    ("Filter projects by team member.", True),
+    ("Summarize updates for this project.", False),
+    ("What are the key blockers for projects?", False),
+    ("Provide a summary of the last meeting.", False),
+    ("What are the main issues with the project?", False),
+    ("give details of all the call meetings we have", False),
+    ("What are the main takeaways from the last meeting?", False),
+    ("Give all related slack messages", False),
+    ("How are clients responding?", False),
+    ("What’s the overall sentiment?", False),
+    ("Why was the checkout project delayed?", False),
+    ("Any risks we should flag to the client?", False),
+    ("What feedback did the client give on these projects?", False),
+    ("Explain what went wrong with these", False),
+    ("What did we discuss about the homepage redesign?", False),
+    ("Are there any open concerns from the client?", False),
+    ("Tell me more about these projects", False),
+    # conversational questions that mention a date or a status word
+    ("What did the client say last week?", False),
+    ("What may be causing delays on these projects?", False),
+    ("What is the deployment plan for these projects?", False),
+    ("What is holding up the projects in progress?", False),
+    ("What was done on these projects yesterday?", False),
+]
+
+
+def evaluate(llm_classifier=None, labeled=LABELED_FILTER_QUERIES):
+    """Prints how often the rules defer to the model and how their answers compare to the labels (and the LLM, if given).
+
+    llm_classifier is an async function taking a query and returning True/False.
+    """
+    decided = correct = 0
+    started = time.perf_counter()
+    decisions = [classify_filter_intent(query) for query, _ in labeled]
+    per_query_us = (time.perf_counter() - started) / len(labeled) * 1e6
+    for (query, label), decision in zip(labeled, decisions):
+        if decision is not None:
+            decided += 1
+            correct += decision == label
+        else:
+            print(f"  ↪ fallback: {query}")
+    print(f"Rules decided {decided}/{len(labeled)} (fallback rate {1 - decided / len(labeled):.0%}), "
+          f"{correct}/{decided} agree with labels, {per_query_us:.0f}µs per query")
+
+    if llm_classifier is None:
+        return
+
+    async def ask_all():
+        return await asyncio.gather(*(llm_classifier(query) for query, _ in labeled))
+
+    llm_answers = asyncio.run(ask_all())
+    llm_correct = sum(answer == label for answer, (_, label) in zip(llm_answers, labeled))
+    agree = sum(decision == answer for decision, answer in zip(decisions, llm_answers) if decision is not None)
+    print(f"LLM agrees with labels on {llm_correct}/{len(labeled)}; rules agree with the LLM on {agree}/{decided} decided")
+    for (query, label), decision, answer in zip(labeled, decisions, llm_answers):
+        if decision is not None and decision != answer:
+            print(f"  ≠ rules={decision} llm={answer} label={label}: {query}")
+
+
+if __name__ == "__main__":
+    # python query_rules.py [--llm]
+    if "--llm" in sys.argv:
+        from gemini_utils import classify_multiple_projects_query_intent_with_gemini
+        evaluate(classify_multiple_projects_query_intent_with_gemini)
+    else:
+        evaluate()
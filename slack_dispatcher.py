@@ -0,0 +1,114 @@
+import os
+import time
+import queue
+import threading
+from dotenv import load_dotenv
+load_dotenv()
+
+# Slack work items handled at once. A worker only reads the thread, posts the typing/confirmation messages and hands
+# the query to the shared event loop, a few Slack round trips; FAISS and Gemini run on the loop, not on the worker
+SLACK_WORKERS = int(os.getenv("SLACK_WORKERS", "4"))
+# Events waiting for a worker before new ones are turned away
+SLACK_QUEUE_SIZE = int(os.getenv("SLACK_QUEUE_SIZE", "100"))
+
+
+class EventDispatcher:
+    """Bounded queue of Slack work consumed by a fixed pool of worker threads.
+
+    Request handlers submit() and return to Slack straight away; submit() returns False when the queue is full
+    so the handler can push back instead of starting more threads.
+    """
+
+    def __init__(self, workers=SLACK_WORKERS, max_queue=SLACK_QUEUE_SIZE):
+        self.workers = workers
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._accepting = True
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.busy = 0
+        self.max_depth = 0
+        self.wait_seconds = 0.0
+        self._threads = [
+            threading.Thread(target=self._work, name=f"slack-worker-{i}", daemon=True) for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queues fn(*args, **kwargs) for a worker; False if the queue is full or shutting down."""
+        with self._lock:
+            if not self._accepting:
+                return False
+        try:
+            self._queue.put_nowait((fn, args, kwargs, time.monotonic()))
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            print(f"⚠️ Slack queue full ({self._queue.qsize()} waiting), rejecting {fn.__name__}")
+            return False
+        with self._lock:
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, self._queue.qsize())
+        return True
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            fn, args, kwargs, queued_at = item
+            with self._lock:
+                self.busy += 1
+                self.wait_seconds += time.monotonic() - queued_at
+            try:
+                fn(*args, **kwargs)
+                outcome = "completed"
+            except Exception as e:
+                print(f"❌ Error in {fn.__name__}: {str(e)}")
+                outcome = "failed"
+            finally:
+                with self._lock:
+                    self.busy -= 1
+                    setattr(self, outcome, getattr(self, outcome) + 1)
+                self._queue.task_done()
+
+    def stats(self):
+        with self._lock:
+            started = self.completed + self.failed + self.busy
+            return {
+                "depth": self._queue.qsize(),
+                "max_depth": self.max_depth,
+                "busy_workers": self.busy,
+                "workers": self.workers,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_wait_ms": round(self.wait_seconds / started * 1000, 1) if started else 0.0,
+            }
+
+    def shutdown(self, timeout=30):
+        """Stops accepting work and gives queued and running items up to timeout seconds to finish."""
+        with self._lock:
+            if not self._accepting:
+                return
+            self._accepting = False
+        print(f"🛑 Draining Slack queue ({self._queue.qsize()} waiting, {self.busy} running)...")
+        deadline = time.monotonic() + timeout
+        try:
+            for _ in self._threads:
+                # Sentinels queue behind the remaining work, so everything already accepted still runs
+                self._queue.put(None, timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Full:
+            pass
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        unfinished = sum(thread.is_alive() for thread in self._threads)
+        if unfinished:
+            print(f"⚠️ {unfinished} Slack workers still busy after {timeout}s, exiting anyway")
+        else:
+            print("✅ Slack queue drained")
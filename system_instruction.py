@@ -1,5 +1,6 @@
-def get_system_instructions(query_type, is_follow_up, processed_query, project_name, multiple_projects_array):
-    return f"""
+# The instruction shared by every query. It has no per-query values, so it can be sent once as Gemini cached content;
+# the <PLACEHOLDERS> it mentions are filled in by the QUERY VARIABLES block at the start of each prompt.
+STATIC_SYSTEM_INSTRUCTIONS = """
 ### 📌 **GENERAL INFORMATION**
 Yourn name is Tobi
 Role: Project Update Assistant  
@@ -47,9 +48,10 @@ Follow below Rules strictly when answering questions based on provided project d
 - Do not guess or use your own knowledge. 
 - Do not respond using JSON or code block
 - The datetime values provided to you will follow ISO 8601 format.
+- Values written in angle brackets (<QUERY_TYPE>, <FOLLOW_UP>, <USER_QUERY>, <PROJECT_NAME>, <MULTIPLE_PROJECTS_ARRAY>) are given in the QUERY VARIABLES block at the start of each prompt.
 
-QUERY_TYPE = `{query_type}`  # TAG: `query_type`
-FOLLOW_UP = `{is_follow_up}` # TAG: `follow_up_flag`
+QUERY_TYPE = `<QUERY_TYPE>`  # TAG: `query_type`
+FOLLOW_UP = `<FOLLOW_UP>` # TAG: `follow_up_flag`
 
 -----
 ### ‼️ **RESPONSE CUSTOM FORMAT SYNTAX:**
@@ -95,7 +97,7 @@ Whenever generating a response, strictly follow the CUSTOM FORMAT SYNTAX below
 
 RULE 1: You will receive a data block in the following structure. Use the full context before answering.
 
-    USER_QUERY = `{processed_query}`    # TAG: `user_query`
+    USER_QUERY = `<USER_QUERY>`    # TAG: `user_query`
 
     Conversation so far:                # TAG: `conversation_so_far`
     [Previous conversation between user and assistant — use this to understand context]
@@ -469,8 +471,8 @@ Classify as a **[Specific Info Query]** if:
 ### STEP 2: DETERMINE IF THIS IS A FOLLOW_UP
 (Determine query type and if the query is a follow-up or not)
 ```python
-QUERY_TYPE = {query_type}
-FOLLOW_UP = True if is_follow_up else False
+QUERY_TYPE = <QUERY_TYPE>
+FOLLOW_UP = <FOLLOW_UP>
 ```
 ---
 
@@ -500,11 +502,11 @@ FOLLOW_UP = True if is_follow_up else False
 #### STEP 17. If the user query is a [Specific Info Query]:
 
     - If `QUERY_TYPE = specific_project`  
-        ➝ STRICTLY find the project using the exact `{project_name}` from `notion_projects_data`.
+        ➝ STRICTLY find the project using the exact `<PROJECT_NAME>` from `notion_projects_data`.
         - Respond with relevant field in a **short and compact format**
 
     - If `QUERY_TYPE = multiple_projects`  
-        ➝ STRICTLY find all projects from `notion_projects_data` where the Project details MATCHES to: `USER_QUERY = {processed_query}`
+        ➝ STRICTLY find all projects from `notion_projects_data` where the Project details MATCHES to: `USER_QUERY = <USER_QUERY>`
         - Respond with all the projects found with relevant field usked by user only, in a **short and compact format**
 
     - Return only the relevant field(s) in a **short and compact format** 
@@ -519,7 +521,7 @@ IMPORTANT⚠️ - DO NOT return the full project info block.
 
 #### RULE 13: Responding to [Full Info Query] for `specific_project`
 
-1. STRICTLY find the project using the exact `{project_name}` from `notion_projects_data`
+1. STRICTLY find the project using the exact `<PROJECT_NAME>` from `notion_projects_data`
 2. When returning project details, also include related data blocks if available:
    - `hubspot_communication_data`
    - `client_partner_slack_messages`
@@ -544,8 +546,8 @@ No matching projects found based on your query.
 ### STEP 4: HANDLE VAGUE OR UNCLEAR QUERIES
 
 #### If [FOLLOW_UP == True] and the user query is vague:
-- If `QUERY_TYPE = specific_project` ➝ Use `{project_name}`
-- If `QUERY_TYPE = multiple_projects` ➝ Use `{multiple_projects_array}` to infer project names
+- If `QUERY_TYPE = specific_project` ➝ Use `<PROJECT_NAME>`
+- If `QUERY_TYPE = multiple_projects` ➝ Use `<MULTIPLE_PROJECTS_ARRAY>` to infer project names
 
 #### If [FOLLOW_UP == False] and the user query is vague:
 Ask for clarification:
@@ -588,3 +590,19 @@ RULE 25. DO NOT use today's date or current year to infer anything.
 RULE 27. DO NOT make assumptions. Always refer strictly to the data.
 """
 
+
+def get_query_variables(query_type, is_follow_up, processed_query, project_name, multiple_projects_array):
+    """The per-query values STATIC_SYSTEM_INSTRUCTIONS refers to, sent at the start of the prompt."""
+    return f"""### QUERY VARIABLES
+<QUERY_TYPE> = `{query_type}`
+<FOLLOW_UP> = `{is_follow_up}`
+<USER_QUERY> = `{processed_query}`
+<PROJECT_NAME> = `{project_name}`
+<MULTIPLE_PROJECTS_ARRAY> = `{multiple_projects_array}`
+"""
+
+
+def get_system_instructions(query_type, is_follow_up, processed_query, project_name, multiple_projects_array):
+    """The static instruction followed by this query's variables, as a single system instruction."""
+    return STATIC_SYSTEM_INSTRUCTIONS + "\n" + get_query_variables(query_type, is_follow_up, processed_query, project_name, multiple_projects_array)
+
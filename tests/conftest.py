@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Modules read their configuration at import time
+os.environ.setdefault("GOOGLE_CREDENTIALS_JSON", "{}")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
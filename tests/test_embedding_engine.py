@@ -0,0 +1,48 @@
+import threading
+import google.api_core.exceptions
+import embedding_engine
+from embedding_engine import AIMDRateController, BatchEmbedder
+
+
+def test_batches_come_back_in_order(monkeypatch):
+    monkeypatch.setattr(embedding_engine.time, "sleep", lambda seconds: None)
+    sizes = []
+    lock = threading.Lock()
+
+    def stub(batch):
+        with lock:
+            sizes.append(len(batch))
+        return [[float(int(text))] for text in batch]
+
+    embedder = BatchEmbedder(stub, batch_size=10, controller=AIMDRateController(max_concurrency=4))
+    texts = [str(i) for i in range(95)]
+    assert embedder.embed(texts) == [[float(i)] for i in range(95)]
+    assert sorted(sizes) == [5] + [10] * 9
+    report = embedder.report()
+    assert report["chunks"] == 95
+    assert report["requests"] == 10
+    assert report["throttled"] == 0
+
+
+def test_concurrency_halves_on_quota_errors_and_recovers(monkeypatch):
+    monkeypatch.setattr(embedding_engine.time, "sleep", lambda seconds: None)
+    controller = AIMDRateController(max_concurrency=8)
+    failures = [True, True]
+    limits = []  # the limit each request was admitted under
+
+    def stub(batch):
+        limits.append(controller.limit)
+        if failures:
+            failures.pop()
+            raise google.api_core.exceptions.ResourceExhausted("quota")
+        return [[0.0] for _ in batch]
+
+    embedder = BatchEmbedder(stub, batch_size=1, controller=controller, delay=0)
+    embedder.embed(["a"])
+    assert limits == [4, 2, 1]  # halved after each quota error
+    embedder.embed([str(i) for i in range(50)])
+    assert controller.limit > 4  # grown back additively by the successes
+    report = embedder.report()
+    assert report["throttled"] == 2
+    assert report["requests"] == 51
+    assert report["concurrency_limit"] == int(controller.limit)
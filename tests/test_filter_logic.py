@@ -0,0 +1,78 @@
+import pytest
+from filter_logic import query_notion_projects, query_notion_projects_reference
+
+PROJECTS = [
+    {"Project Name": "Checkout Redesign", "Status": "In Progress", "Created Time": "2025-01-10",
+     "Deployment Date": "2025-03-02", "Total Project Hours": "12", "Projected Dev Hours": "8", "Details": "Stripe work"},
+    {"Project Name": "Homepage Refresh", "Status": "Done", "Created Time": "2025-02-01",
+     "Deployment Date": "2025-02-20", "Total Project Hours": "4.5", "Projected Dev Hours": "", "Details": "Hero banner"},
+    {"Project Name": "The Project", "Status": "Ready For Client", "Created Time": "2025-02-15T09:30:00",
+     "Deployment Date": None, "Total Project Hours": None, "Projected Dev Hours": "3", "Details": None},
+    {"Project Name": "Chekout Redesgn v2", "Status": "Code Review", "Created Time": "not a date",
+     "Deployment Date": "2025-03-10", "Total Project Hours": "20", "Projected Dev Hours": "15", "Details": "stripe fixes"},
+    {"Project Name": "", "Status": None, "Created Time": None,
+     "Deployment Date": None, "Total Project Hours": None, "Projected Dev Hours": None, "Details": ""},
+]
+
+
+def where(prop, kind, condition):
+    return {"property": prop, kind: condition}
+
+
+CASES = {
+    "equals": [where("Status", "select", {"equals": "Done"})],
+    "not_equals": [where("Status", "select", {"not_equals": "Done"})],
+    "contains": [where("Details", "rich_text", {"contains": "STRIPE"})],
+    "not_contains": [where("Details", "rich_text", {"not_contains": "stripe"})],
+    "before": [where("Created Time", "date", {"before": "2025-02-01"})],
+    "after": [where("Created Time", "date", {"after": "2025-02-01"})],
+    "between": [where("Deployment Date", "date", {"on_or_after": "2025-02-20", "on_or_before": "2025-03-02"})],
+    "invalid date target": [where("Created Time", "date", {"before": "2025-02-30"})],
+    "greater_than": [where("Total Project Hours", "number", {"greater_than": 5})],
+    "less_than": [where("Projected Dev Hours", "number", {"less_than": "10"})],
+    "status_match string": [where("Status", "select", {"status_match": "progress"})],
+    "status_match list": [where("Status", "select", {"status_match": ["Done", "Code Review"]})],
+    "project_match tokens": [where("Project Name", "rich_text", {"project_match": "checkout"})],
+    "project_match fuzzy": [where("Project Name", "rich_text", {"project_match": "chekoutredesign"})],
+    "project_match stop words only": [where("Project Name", "rich_text", {"project_match": "the project"})],
+    "project_match empty": [where("Project Name", "rich_text", {"project_match": ""})],
+    "combined": [
+        where("Details", "rich_text", {"contains": "stripe"}),
+        where("Total Project Hours", "number", {"greater_than": 10}),
+        where("Deployment Date", "date", {"after": "2025-03-05"}),
+    ],
+    # the target is only parsed for projects with a value, so no project reaches the error here
+    "invalid number target, no values": [
+        where("Status", "select", {"equals": "Ready For Client"}),
+        where("Total Project Hours", "number", {"greater_than": "lots"}),
+    ],
+    "unknown operator": [where("Status", "select", {"starts_with": "Do"})],
+}
+
+
+def outcome(query, filters):
+    try:
+        return query(filters, PROJECTS)
+    except Exception as e:
+        return type(e)
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_compiled_filter_matches_reference(name):
+    filters = {"and": CASES[name]}
+    assert outcome(query_notion_projects, filters) == outcome(query_notion_projects_reference, filters)
+
+
+def test_invalid_number_target_fails_like_the_reference():
+    filters = {"and": [where("Total Project Hours", "number", {"greater_than": "lots"})]}
+    assert outcome(query_notion_projects, filters) is ValueError
+    assert outcome(query_notion_projects_reference, filters) is ValueError
+
+
+def test_non_numeric_hours_are_excluded_instead_of_failing_the_query():
+    # Intended difference: the reference raises on the first unparsable cell, the compiled plan skips that project
+    projects = PROJECTS + [{"Project Name": "Odd Hours", "Status": "Done", "Total Project Hours": "n/a"}]
+    filters = {"and": [where("Total Project Hours", "number", {"greater_than": 5})]}
+    with pytest.raises(ValueError):
+        query_notion_projects_reference(filters, projects)
+    assert [p["Project Name"] for p in query_notion_projects(filters, projects)] == ["Checkout Redesign", "Chekout Redesgn v2"]
@@ -0,0 +1,43 @@
+import os
+import faiss
+import index_client_data
+from index_client_data import FAISSVectorStore, chunk_text
+
+
+def fake_fetch_if_changed(doc_id, revision, content_hash):
+    if revision == "r1":
+        return None, "r1"
+    return "First line about the client.\n\nSecond paragraph about the client.", "r1"
+
+
+def fake_embed(texts):
+    return [[float(len(text)), 1.0, 0.0, 0.0] for text in texts]
+
+
+def test_create_index_restores_deleted_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(index_client_data, "fetch_if_changed", fake_fetch_if_changed)
+    monkeypatch.setattr(index_client_data, "get_gemini_embedding_parallel", fake_embed)
+    for name in ("notion_documents", "hubspot_documents", "raw_messages_documents", "transcript_documents",
+                 "internal_slack_messages_documents"):
+        monkeypatch.setattr(index_client_data, name, [])
+    monkeypatch.setattr(index_client_data, "faq_documents", [{"docId": "d1", "clientName": "acme"}])
+
+    store = FAISSVectorStore(index_dir=str(tmp_path))
+    store.create_index([])
+    index_path = os.path.join(str(tmp_path), "acme_faq.faiss")
+    assert os.path.exists(index_path)
+
+    os.remove(index_path)
+    store.create_index([])
+    assert os.path.exists(index_path)
+    assert faiss.read_index(index_path).ntotal > 0
+
+
+def test_long_lines_still_overlap():
+    # Slack export lines: one long sentence each, longer than the overlap budget
+    lines = [f"[10:{i:02d}] user{i % 3}: " + " ".join(f"word{i}x{j}" for j in range(60)) for i in range(40)]
+    chunks = chunk_text("\n".join(lines), max_tokens=256, overlap_tokens=32)
+    assert len(chunks) > 1
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert len(chunk) <= 256 * 4
+        assert any(previous.endswith(chunk[:size]) for size in range(20, len(chunk)))
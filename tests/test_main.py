@@ -0,0 +1,133 @@
+import gc
+import asyncio
+import main
+from answer_cache import AnswerCache
+
+
+def ask(query, thread_ts):
+    thread_context = [{"role": "user", "text": query}]
+    return asyncio.run(main.process_faiss_and_generate_responses(
+        query, thread_context, "acme", "C1", thread_ts, "specific_project", "U1", "Checkout"
+    ))
+
+
+def test_regenerate_evicts_the_cached_answer(monkeypatch):
+    generated = []
+
+    async def fake_search(query, assistant_name, channel, thread_ts, named_projects=None):
+        return {"notion_chunks": [{"Project Name": "Checkout", "Status": "In Progress"}], "faq_chunks": ["faq"]}
+
+    async def fake_generate(user_query, *args, **kwargs):
+        generated.append(user_query)
+        return f"answer {len(generated)}"
+
+    async def fake_send(*args, **kwargs):
+        return {"ok": True, "ts": "1"}
+
+    handled = []
+    monkeypatch.setattr(main, "answer_cache", AnswerCache())
+    monkeypatch.setattr(main, "async_faiss_search", fake_search)
+    monkeypatch.setattr(main.faiss_store, "index_version", lambda client_name: "v1")
+    monkeypatch.setattr(main, "generate_final_response", fake_generate)
+    monkeypatch.setattr(main, "send_slack_response_async", fake_send)
+    monkeypatch.setattr(main, "send_slack_response_feedback_async", fake_send)
+    monkeypatch.setattr(main, "get_channel_name", lambda channel_id, client: "acme-internal")
+    monkeypatch.setattr(main, "get_thread_messages", lambda client, channel, thread_ts: [])
+    monkeypatch.setattr(main, "handle_slack_actions", lambda *args, **kwargs: handled.append(args))
+
+    query = "What is the status of Checkout?"
+    ask(query, "regen-1")
+    ask(query, "regen-2")
+    assert len(generated) == 1  # the second thread was served from the cache
+
+    main.handle_interactive_action({
+        "channel": {"id": "C1"},
+        "user": {"id": "U1"},
+        "actions": [{"value": "regenerate"}],
+        "original_message": {"ts": "2", "thread_ts": "regen-1"},
+    })
+    assert handled
+
+    ask(query, "regen-3")
+    assert len(generated) == 2  # the regenerated answer is no longer served to new threads
+
+
+def test_filter_answers_are_not_cached(monkeypatch):
+    generated = []
+
+    async def fake_classify(user_query):
+        return True
+
+    async def fake_generate(user_query, *args, **kwargs):
+        generated.append(user_query)
+        return f"answer {len(generated)}"
+
+    async def fake_send(*args, **kwargs):
+        return {"ok": True, "ts": "1"}
+
+    monkeypatch.setattr(main, "answer_cache", AnswerCache())
+    monkeypatch.setattr(main, "classify_multiple_projects_query_intent", fake_classify)
+    monkeypatch.setattr(main.faiss_store, "get_notion_chunks", lambda client_name: {"notion_chunks": []})
+    monkeypatch.setattr(main.faiss_store, "index_version", lambda client_name: "v1")
+    monkeypatch.setattr(main, "generate_final_response", fake_generate)
+    monkeypatch.setattr(main, "send_slack_response_async", fake_send)
+    monkeypatch.setattr(main, "send_slack_response_feedback_async", fake_send)
+
+    query = "List projects deployed last week"
+    for thread_ts in ("filter-1", "filter-2"):
+        asyncio.run(main.process_faiss_and_generate_responses(
+            query, [{"role": "user", "text": query}], "acme", "C1", thread_ts, "multiple_projects", "U1", None
+        ))
+    assert len(generated) == 2
+
+
+def stub_filter_answer(monkeypatch):
+    async def fake_generate(user_query, *args, **kwargs):
+        return "answer"
+
+    async def fake_send(*args, **kwargs):
+        return {"ok": True, "ts": "1"}
+
+    monkeypatch.setattr(main, "answer_cache", AnswerCache())
+    monkeypatch.setattr(main.faiss_store, "get_notion_chunks", lambda client_name: {"notion_chunks": []})
+    monkeypatch.setattr(main, "generate_final_response", fake_generate)
+    monkeypatch.setattr(main, "send_slack_response_async", fake_send)
+    monkeypatch.setattr(main, "send_slack_response_feedback_async", fake_send)
+
+
+def ask_multiple_projects(query, thread_ts):
+    asyncio.run(main.process_faiss_and_generate_responses(
+        query, [{"role": "user", "text": query}], "acme", "C1", thread_ts, "multiple_projects", "U1", None
+    ))
+
+
+def test_locally_classified_filter_starts_no_retrieval(monkeypatch):
+    started = []
+
+    def fake_retrieve(*args):
+        started.append(args)
+        return asyncio.sleep(0, ([], {}))
+
+    stub_filter_answer(monkeypatch)
+    monkeypatch.setattr(main, "retrieve_multiple_projects_context", fake_retrieve)
+    ask_multiple_projects("List projects deployed last week", "local-filter")
+    assert started == []
+
+
+def test_discarded_retrieval_exception_is_consumed(monkeypatch, caplog):
+    async def failing_retrieve(*args):
+        try:
+            await asyncio.sleep(1)
+        finally:
+            raise RuntimeError("search failed")  # e.g. cleanup failing once the task is cancelled
+
+    async def slow_classify(user_query):
+        await asyncio.sleep(0.01)  # Gemini is deciding while the retrieval runs
+        return True
+
+    stub_filter_answer(monkeypatch)
+    monkeypatch.setattr(main, "retrieve_multiple_projects_context", failing_retrieve)
+    monkeypatch.setattr(main, "classify_multiple_projects_query_intent", slow_classify)
+    ask_multiple_projects("Which projects need attention?", "gemini-filter")
+    gc.collect()
+    assert "exception was never retrieved" not in caplog.text
@@ -0,0 +1,9 @@
+from project_name_index import FUZZY_CANDIDATES, ProjectNameIndex
+
+
+def test_fuzzy_match_outside_the_candidate_limit_is_found():
+    # Decoys share more trigrams with the query than the misspelled project does, but none is similar enough
+    names = [f"checkout redesign phase {i} extra words" for i in range(FUZZY_CANDIDATES * 2)] + ["Chekout Redesgn"]
+    index = ProjectNameIndex(names)
+    assert index.best_match("checkoutredesign", cutoff=0.8) == "Chekout Redesgn"
+    assert len(names) - 1 in index.matching_positions("checkoutredesign")
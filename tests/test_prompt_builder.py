@@ -0,0 +1,16 @@
+from prompt_builder import PromptAssembler
+
+
+def test_items_matching_the_query_survive_the_cut():
+    filler = "weekly sync notes about hiring and the office move " * 4
+    relevant = "the stripe checkout webhook failed during deployment"
+    # FAISS put the relevant chunk last; only one chunk fits the budget
+    sections = {"transcript": [filler + "one", filler + "two", relevant]}
+    fitted = PromptAssembler().fit_sections(sections, budget=20, query="why did the stripe webhook fail?")
+    assert fitted["transcript"] == f"- {relevant}"
+
+
+def test_ties_keep_retrieval_order():
+    sections = {"faq": ["first answer", "second answer", "third answer"]}
+    fitted = PromptAssembler().fit_sections(sections, budget=1000, query="unrelated question")
+    assert fitted["faq"] == "- first answer\n- second answer\n- third answer"
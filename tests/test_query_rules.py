@@ -0,0 +1,13 @@
+from query_rules import parse_filter_query
+
+
+def test_invalid_iso_dates_fall_back_to_gemini():
+    assert parse_filter_query("projects created between 2025-01-01 and 2025-02-30", 2025) is None
+    assert parse_filter_query("projects created before 2025-13-01", 2025) is None
+    assert parse_filter_query("projects created in: ('2025-02-01', '2025-02-30')", 2025) is None
+
+
+def test_valid_iso_dates_are_parsed():
+    assert parse_filter_query("projects created between 2025-01-01 and 2025-02-28", 2025) == {
+        "created_time": {"between": ["2025-01-01", "2025-02-28"]}
+    }
@@ -0,0 +1,46 @@
+import random
+import threading
+import time
+import utils
+from utils import ProjectNameCache, SlackMessageStream, convert_to_slack_message
+
+ANSWER = (
+    "!!Status update!!<br>Here is __where things stand__:\n"
+    "- Checkout: [ticket](https://example.com/1) in review\n"
+    "- Homepage: done\n\n"
+    ":: Owner: Sam\n"
+    ">> Client asked for a demo\n"
+    "- Search: blocked"
+)
+
+
+def test_stream_matches_whole_message_conversion():
+    rng = random.Random(7)
+    for _ in range(200):
+        cuts = sorted(rng.sample(range(1, len(ANSWER)), 12))
+        pieces = [ANSWER[start:end] for start, end in zip([0] + cuts, cuts + [len(ANSWER)])]
+        stream = SlackMessageStream()
+        for piece in pieces:
+            text = stream.feed(piece)
+        assert text == convert_to_slack_message(ANSWER).strip()
+
+
+def test_cold_misses_share_one_sheet_read(monkeypatch):
+    reads = []
+
+    def slow_fetch(sheet_id, range_name, credentials):
+        reads.append(sheet_id)
+        time.sleep(0.05)
+        return [["Project"], ["Checkout Redesign"]]
+
+    monkeypatch.setattr(utils, "fetch_google_sheet_data", slow_fetch)
+    monkeypatch.setitem(utils.ASSISTANT_SHEET_MAP, "acme", "sheet-acme")
+    cache = ProjectNameCache()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("Acme"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert reads == ["sheet-acme"]
+    assert results == [["Project", "Checkout Redesign"]] * 8
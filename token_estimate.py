@@ -0,0 +1,7 @@
+# Gemini averages ~4 characters per token on English text; good enough for budgets and throughput figures
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Rough token count of text, cheap enough to run on every chunk and prompt section."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
@@ -8,15 +8,22 @@ from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 # from datetime import datetime
 import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dotenv import load_dotenv
 import html
 
 from document_ids import (
     ASSISTANT_SHEET_MAP
 )
+from project_name_index import ProjectNameIndex
 load_dotenv()
 SLACK_BOT_USER_ID = os.getenv("SLACK_BOT_USER_ID")
 GOOGLE_CREDENTIALS = os.getenv("GOOGLE_CREDENTIALS_JSON")
+# Minimum seconds between progressive edits of a streamed answer (chat.update is rate limited per workspace)
+SLACK_STREAM_UPDATE_SECONDS = float(os.getenv("SLACK_STREAM_UPDATE_SECONDS", "1.5"))
+# How long project names read from an assistant's Google Sheet are served before a background refresh
+SHEET_CACHE_TTL_SECONDS = int(os.getenv("SHEET_CACHE_TTL_SECONDS", "600"))
 
 # Thread-safe metadata storage
 thread_metadata = {}
@@ -75,62 +82,111 @@ def get_thread_messages(slack_client, channel, thread_ts):
     
 
 
-def find_relevant_project_name(query, project_names):
-    """Finds the most relevant project name using keyword matching and fuzzy matching."""
-    from difflib import get_close_matches
-    import re
+_sheets_local = threading.local()
 
-    # Basic stop words to ignore
-    stop_words = {"when", "did", "we", "deploy", "deployed", "the", "to", "of", "on", "in", "for","hi","hello","hey","there","how","are","you","what","is","this","project","about","can","you","tell","me","more"}
-
-    # Normalize and tokenize
-    def tokenize(text):
-        words = re.findall(r'\w+', text.lower())
-        return set(word for word in words if word not in stop_words)
-
-    query_keywords = tokenize(query)
-
-    # Step 1: Keyword intersection
-    best_match = None
-    max_overlap = 0
-    for project in project_names:
-        project_keywords = tokenize(project)
-        overlap = len(query_keywords & project_keywords)
-        if overlap > max_overlap:
-            max_overlap = overlap
-            best_match = project
-
-    if max_overlap > 0:
-        return best_match
-
-    # Step 2: Fallback to fuzzy match
-    normalized_query = ''.join(tokenize(query))
-    normalized_projects = {
-        name: ''.join(tokenize(name))
-        for name in project_names
-    }
-
-    matches = get_close_matches(normalized_query, normalized_projects.values(), n=1, cutoff=0.5)
-    if matches:
-        for original_name, normalized_name in normalized_projects.items():
-            if matches[0] == normalized_name:
-                return original_name
-    return None
-
-def fetch_google_sheet_data(sheet_id, range_name, google_credentials):
-    """Fetches data from a Google Sheet."""
-    try:
+def get_sheets_service(google_credentials):
+    """Returns this thread's Sheets service, built once per thread instead of once per read."""
+    services = getattr(_sheets_local, "services", None)
+    if services is None:
+        services = _sheets_local.services = {}
+    if google_credentials not in services:
         credentials = service_account.Credentials.from_service_account_info(
             json.loads(google_credentials),
             scopes=["https://www.googleapis.com/auth/spreadsheets.readonly"]
         )
-        service = build("sheets", "v4", credentials=credentials)
+        services[google_credentials] = build("sheets", "v4", credentials=credentials, cache_discovery=False)
+    return services[google_credentials]
+
+def fetch_google_sheet_data(sheet_id, range_name, google_credentials):
+    """Fetches data from a Google Sheet."""
+    try:
+        service = get_sheets_service(google_credentials)
         result = service.spreadsheets().values().get(spreadsheetId=sheet_id, range=range_name).execute()
         return result.get("values", [])
     except Exception as e:
         print(f"❌ Google Sheets API Error: {e}")
         return []
 
+
+class ProjectNameCache:
+    """Per-assistant project names from the Google Sheet, served stale-while-revalidate.
+
+    A fresh entry is returned as is; a stale one is returned immediately while a background refresh runs.
+    Only an assistant that was never loaded waits for Google, and concurrent callers share a single read of its sheet.
+    """
+
+    def __init__(self, ttl_seconds=SHEET_CACHE_TTL_SECONDS, range_name="Sheet1!B:B"):
+        self.ttl_seconds = ttl_seconds
+        self.range_name = range_name
+        self._entries = {}  # assistant -> (project names, ProjectNameIndex over them, fetched at)
+        self._loading = {}  # assistant -> Future of the sheet read in flight
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="sheet-refresh")
+
+    def _load(self, assistant):
+        rows = fetch_google_sheet_data(ASSISTANT_SHEET_MAP[assistant], self.range_name, GOOGLE_CREDENTIALS)
+        project_names = [row[0] for row in rows if row]
+        # Built once per fetch, off the request path for every load but an assistant's first
+        entry = (project_names, ProjectNameIndex(project_names), time.monotonic())
+        with self._lock:
+            # Keep serving the previous names if the read failed
+            if project_names or assistant not in self._entries:
+                self._entries[assistant] = entry
+            return self._entries[assistant]
+
+    def _load_once(self, assistant):
+        """Reads the assistant's sheet, or waits for the read already in flight so it is fetched once."""
+        with self._lock:
+            loading = self._loading.get(assistant)
+            owner = loading is None
+            if owner:
+                loading = self._loading[assistant] = Future()
+        if not owner:
+            return loading.result()
+
+        try:
+            entry = self._load(assistant)
+        except Exception as e:
+            with self._lock:
+                del self._loading[assistant]
+            loading.set_exception(e)
+            raise
+        with self._lock:
+            del self._loading[assistant]
+        loading.set_result(entry)
+        return entry
+
+    def _refresh_in_background(self, assistant):
+        with self._lock:
+            if assistant in self._loading:
+                return
+        self._executor.submit(self._load_once, assistant)
+
+    def _entry(self, assistant):
+        assistant = assistant.lower()
+        with self._lock:
+            entry = self._entries.get(assistant)
+        if entry is None:
+            return self._load_once(assistant)
+        if time.monotonic() - entry[2] > self.ttl_seconds:
+            self._refresh_in_background(assistant)
+        return entry
+
+    def get(self, assistant):
+        return self._entry(assistant)[0]
+
+    def get_index(self, assistant):
+        """The ProjectNameIndex over the assistant's current project names."""
+        return self._entry(assistant)[1]
+
+    def warm_all(self):
+        """Loads every assistant's sheet concurrently; called in the background at startup."""
+        started = time.monotonic()
+        list(self._executor.map(self._load_once, ASSISTANT_SHEET_MAP))
+        print(f"📋 Project names cached for {len(ASSISTANT_SHEET_MAP)} assistants in {time.monotonic() - started:.1f}s")
+
+project_name_cache = ProjectNameCache()
+
 def clean_slack_formatting(text):
     # Unescape HTML entities
     text = html.unescape(text)
@@ -192,6 +248,58 @@ def send_slack_response(slack_client, channel, text, thread_ts, metadata=None, a
         print(f"❌ Slack API Error: {e.response['error']}")
         return None
 
+async def send_slack_response_async(slack_client, channel, text, thread_ts, metadata=None, attachments=None):
+    """Sends a response to Slack through an AsyncWebClient."""
+    try:
+        return await slack_client.chat_postMessage(
+            channel=channel,
+            text=text,
+            thread_ts=thread_ts,
+            mrkdwn=True,
+            metadata=metadata,
+            attachments=attachments or []
+        )
+    except SlackApiError as e:
+        print(f"❌ Slack API Error: {e.response['error']}")
+        return None
+
+class SlackMessageUpdater:
+    """Progressively edits one Slack message through an AsyncWebClient, at most once per min_interval seconds.
+
+    Intermediate texts arriving faster than that are skipped (only the latest matters); when Slack rate limits
+    chat.update, previews pause for the Retry-After it asks for. finish() always writes the final text.
+    """
+
+    def __init__(self, slack_client, channel, ts, min_interval=SLACK_STREAM_UPDATE_SECONDS):
+        self.slack_client = slack_client
+        self.channel = channel
+        self.ts = ts
+        self.min_interval = min_interval
+        self.updates = 0
+        self._next_update = 0.0
+
+    async def update(self, text):
+        now = time.monotonic()
+        if not text or now < self._next_update:
+            return
+        self._next_update = now + self.min_interval
+        try:
+            await self.slack_client.chat_update(channel=self.channel, ts=self.ts, text=text + " :typingcatr:")
+            self.updates += 1
+        except SlackApiError as e:
+            if e.response.status_code == 429:
+                self._next_update = now + int(e.response.headers.get("Retry-After", 1))
+            else:
+                print(f"❌ Slack API Error: {e.response['error']}")
+
+    async def finish(self, text, metadata=None):
+        """Writes the final text (and message metadata); returns the response, or None if Slack refused."""
+        try:
+            return await self.slack_client.chat_update(channel=self.channel, ts=self.ts, text=text, metadata=metadata)
+        except SlackApiError as e:
+            print(f"❌ Slack API Error: {e.response['error']}")
+            return None
+
 def send_clarification_buttons(slack_client, channel, thread_ts):
     """Sends clarification buttons to Slack."""
     try:
@@ -220,34 +328,42 @@ def send_clarification_buttons(slack_client, channel, thread_ts):
         return None
     
 
+FEEDBACK_ATTACHMENTS = [
+    {
+        "text": "Did this answer your question?",
+        "fallback": "Unable to give feedback",
+        "callback_id": "feedback_response",
+        "actions": [
+            {"name": "feedback", "text": "🔄 Regenerate", "type": "button", "value": "regenerate"},
+        ],
+    }
+]
+
 def send_slack_response_feedback(slack_client, channel, thread_ts):
     """Send interactive 'Regenerate' button to Slack"""
     try:
         response = slack_client.chat_postMessage(
             channel=channel,
             thread_ts=thread_ts,
-            attachments=[
-                {
-                    "text": "Did this answer your question?",
-                    "fallback": "Unable to give feedback",
-                    "callback_id": "feedback_response",
-                    "actions": [
-                        {"name": "feedback", "text": "🔄 Regenerate", "type": "button", "value": "regenerate"},
-                    ],
-                }
-            ],
+            attachments=FEEDBACK_ATTACHMENTS,
         )
         return response
     except SlackApiError as e:
         print(f"❌ Slack API Error: {e.response['error']}")
         return None
+
+async def send_slack_response_feedback_async(slack_client, channel, thread_ts):
+    """Send interactive 'Regenerate' button to Slack through an AsyncWebClient"""
+    try:
+        return await slack_client.chat_postMessage(channel=channel, thread_ts=thread_ts, attachments=FEEDBACK_ATTACHMENTS)
+    except SlackApiError as e:
+        print(f"❌ Slack API Error: {e.response['error']}")
+        return None
     
 def send_specific_project_confirmation_button(slack_client, user_query, assistant_name, channel, thread_ts):
     """Handles queries about specific projects."""
     try:
-        sheet_id = ASSISTANT_SHEET_MAP[assistant_name.lower()]
-        project_names = [row[0] for row in fetch_google_sheet_data(sheet_id, "Sheet1!B:B",GOOGLE_CREDENTIALS) if row]
-        relevant_project = find_relevant_project_name(user_query, project_names)
+        relevant_project = project_name_cache.get_index(assistant_name).best_match(user_query)
         if relevant_project:
             store_thread_metadata(thread_ts, {"query": user_query, "project_name": relevant_project})
             send_slack_response(
@@ -275,37 +391,67 @@ def send_specific_project_confirmation_button(slack_client, user_query, assistan
 
 
 
-def convert_to_slack_message(markdown_text: str) -> str:
-    # Convert <br> to newline
-    markdown_text = markdown_text.replace('<br>', '\n')
+def convert_slack_line(line, counter):
+    """Converts one line of model markdown to Slack mrkdwn; returns it with the next dash-bullet number."""
     # Convert custom bold: !!text!! → *text*
-    markdown_text = re.sub(r'!!(.*?)!!', r'*\1*', markdown_text)
-    
+    line = re.sub(r'!!(.*?)!!', r'*\1*', line)
+
     # Convert italic: __text__ → _text_
-    markdown_text = re.sub(r'__(.*?)__', r'_\1_', markdown_text)
-    
+    line = re.sub(r'__(.*?)__', r'_\1_', line)
+
     # Convert links: [text](url) → <url|text>
-    markdown_text = re.sub(r'\[(.*?)\]\((.*?)\)', r'<\2|\1>', markdown_text)
-    
+    line = re.sub(r'\[(.*?)\]\((.*?)\)', r'<\2|\1>', line)
+
     # Convert dash bullets (- ) to numbered list: 1., 2., ...
-    lines = markdown_text.splitlines()
-    numbered_lines = []
-    counter = 1
-    for line in lines:
-        if re.match(r'^\s*-\s+', line):
-            content = re.sub(r'^\s*-\s+', '', line)
-            numbered_lines.append(f"{counter}. {content}")
-            counter += 1
-        else:
-            numbered_lines.append(line)
-    markdown_text = '\n'.join(numbered_lines)
-    
+    if re.match(r'^\s*-\s+', line):
+        content = re.sub(r'^\s*-\s+', '', line)
+        line = f"{counter}. {content}"
+        counter += 1
+
     # Convert :: prefix to unstyled bullet → •
-    markdown_text = re.sub(r'^\s*::\s*(.*)', r'• \1', markdown_text, flags=re.MULTILINE)
-    
+    line = re.sub(r'^\s*::\s*(.*)', r'• \1', line)
+
     # Convert >> prefix to block quote → >
-    markdown_text = re.sub(r'^\s*>>\s*(.*)', r'> \1', markdown_text, flags=re.MULTILINE)
-    return markdown_text
+    line = re.sub(r'^\s*>>\s*(.*)', r'> \1', line)
+    return line, counter
+
+def convert_to_slack_message(markdown_text: str) -> str:
+    # Convert <br> to newline
+    markdown_text = markdown_text.replace('<br>', '\n')
+    lines = []
+    counter = 1
+    for line in markdown_text.splitlines():
+        line, counter = convert_slack_line(line, counter)
+        lines.append(line)
+    return '\n'.join(lines)
+
+class SlackMessageStream:
+    """Incremental convert_to_slack_message for text that arrives in pieces.
+
+    Complete lines are converted once with convert_slack_line, keeping the bullet counter across pieces; the
+    unfinished last line is converted again on every preview. The finished message should still go through
+    convert_to_slack_message.
+    """
+
+    def __init__(self):
+        self._converted = []
+        self._pending = ""
+        self._counter = 1
+
+    def feed(self, piece):
+        """Adds the next piece of model output and returns the Slack text so far."""
+        *complete, self._pending = (self._pending + piece).replace('<br>', '\n').split('\n')
+        for line in complete:
+            if self._is_fence(line):
+                continue  # code fence around the whole answer
+            converted, self._counter = convert_slack_line(line, self._counter)
+            self._converted.append(converted)
+        preview = "" if self._is_fence(self._pending) else convert_slack_line(self._pending, self._counter)[0]
+        return '\n'.join(self._converted + [preview]).strip()
+
+    @staticmethod
+    def _is_fence(line):
+        return re.match(r'^\s*`{1,3}\s*(json|text)?\s*$', line, flags=re.IGNORECASE) is not None
 
 def strip_json_wrapper(text):
     # Remove code block wrappers like ```json or ```text